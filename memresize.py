@@ -6,7 +6,12 @@ This script breaks down the monolithic session_cache.md and tasks.md files
 into individual files following the new modular structure.
 
 Usage:
-    python memory_bank_restructure.py
+    python memory_bank_restructure.py [--incremental] [--dry-run] [--report PATH|-] [--quiet]
+    python memory_bank_restructure.py --watch [--interval SECONDS]
+    python memory_bank_restructure.py --merge [--order id|date]
+
+    Paths default to memory-bank/ next to this script and can be changed with --root,
+    --memory-bank, --session-cache, --tasks, --sessions-dir, --tasks-dir and --templates-dir.
 
 Requirements:
     - Python 3.6+
@@ -15,29 +20,62 @@ Requirements:
     - datetime module (standard library)
 """
 
+import argparse
+import hashlib
+import heapq
+import io
+import json
 import os
 import re
+import shutil
+import sqlite3
+import stat
+import sys
+import tempfile
+import threading
+import time
 import datetime
+from bisect import bisect_left, insort
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from functools import lru_cache
 from pathlib import Path
 
+def configure(root=None, memory_bank=None, session_cache=None, tasks=None,
+              sessions_dir=None, tasks_dir=None, templates_dir=None):
+    """
+    Set the paths the script works on. Paths that are not given are derived from the
+    memory bank directory, which defaults to memory-bank/ under root, which in turn
+    defaults to the directory containing this script. Nothing is created on disk.
+    """
+    global PROJECT_ROOT, MEMORY_BANK_DIR, SESSION_CACHE_PATH, TASKS_PATH, SESSIONS_DIR, TASKS_DIR
+    global TEMPLATE_DIR, MANIFEST_PATH, INDEX_PATH
+    global SESSION_TEMPLATE_PATH, TASK_TEMPLATE_PATH, MASTER_SESSION_TEMPLATE_PATH, MASTER_TASK_TEMPLATE_PATH
+    
+    PROJECT_ROOT = Path(root) if root else Path(__file__).resolve().parent
+    MEMORY_BANK_DIR = Path(memory_bank) if memory_bank else PROJECT_ROOT / "memory-bank"
+    SESSION_CACHE_PATH = Path(session_cache) if session_cache else MEMORY_BANK_DIR / "session_cache.md"
+    TASKS_PATH = Path(tasks) if tasks else MEMORY_BANK_DIR / "tasks.md"
+    SESSIONS_DIR = Path(sessions_dir) if sessions_dir else MEMORY_BANK_DIR / "sessions"
+    TASKS_DIR = Path(tasks_dir) if tasks_dir else MEMORY_BANK_DIR / "tasks"
+    TEMPLATE_DIR = Path(templates_dir) if templates_dir else MEMORY_BANK_DIR / "templates"
+    MANIFEST_PATH = MEMORY_BANK_DIR / ".memresize-manifest.json"
+    INDEX_PATH = MEMORY_BANK_DIR / ".memresize-index.sqlite3"
+    
+    # Templates paths
+    SESSION_TEMPLATE_PATH = TEMPLATE_DIR / "session-template.md"
+    TASK_TEMPLATE_PATH = TEMPLATE_DIR / "task-template.md"
+    MASTER_SESSION_TEMPLATE_PATH = TEMPLATE_DIR / "master-session-template.md"
+    MASTER_TASK_TEMPLATE_PATH = TEMPLATE_DIR / "master-task-template.md"
+
+def ensure_output_dirs():
+    """Create the per-item output directories if they do not exist yet."""
+    SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    TASKS_DIR.mkdir(parents=True, exist_ok=True)
+
 # Configuration
-PROJECT_ROOT = Path("/Users/deepak/code/spin_network_app")
-MEMORY_BANK_DIR = PROJECT_ROOT / "memory-bank"
-SESSION_CACHE_PATH = MEMORY_BANK_DIR / "session_cache.md"
-TASKS_PATH = MEMORY_BANK_DIR / "tasks.md"
-SESSIONS_DIR = MEMORY_BANK_DIR / "sessions"
-TASKS_DIR = MEMORY_BANK_DIR / "tasks"
-TEMPLATE_DIR = MEMORY_BANK_DIR / "templates"
-
-# Ensure directories exist
-SESSIONS_DIR.mkdir(exist_ok=True)
-TASKS_DIR.mkdir(exist_ok=True)
-
-# Templates paths
-SESSION_TEMPLATE_PATH = TEMPLATE_DIR / "session-template.md"
-TASK_TEMPLATE_PATH = TEMPLATE_DIR / "task-template.md"
-MASTER_SESSION_TEMPLATE_PATH = TEMPLATE_DIR / "master-session-template.md"
-MASTER_TASK_TEMPLATE_PATH = TEMPLATE_DIR / "master-task-template.md"
+configure()
 
 # Current timestamp for file updates
 TIMESTAMP = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -51,11 +89,203 @@ def read_file(path):
         print(f"Warning: File {path} not found.")
         return ""
 
-def write_file(path, content):
-    """Write content to file."""
-    with open(path, 'w', encoding='utf-8') as file:
+# Process umask, read on first use by _process_umask()
+_UMASK = None
+
+def _process_umask():
+    """
+    Return the process umask. Linux reports it in /proc/self/status; elsewhere it can
+    only be read by setting it, which races with other threads creating files, so the
+    value is cached and BulkWriter reads it before starting its workers.
+    """
+    global _UMASK
+    if _UMASK is None:
+        try:
+            with open('/proc/self/status', encoding='ascii') as status:
+                for line in status:
+                    if line.startswith('Umask:'):
+                        _UMASK = int(line.split()[1], 8)
+                        break
+        except (OSError, ValueError):
+            pass
+        if _UMASK is None:
+            _UMASK = os.umask(0)
+            os.umask(_UMASK)
+    return _UMASK
+
+@contextmanager
+def atomic_open(path):
+    """
+    Open a temporary file in the same directory as path for writing. When the block
+    exits normally the file is synced and renamed over path, so a crash leaves either
+    the old or the new file; on an error the temporary file is removed.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        # mkstemp creates the file as 0600; give it the mode open() would have used
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_process_umask()
+        os.chmod(temp_path, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def _atomic_write(path, content):
+    """
+    Write content to path with atomic_open().
+    Returns False without writing if the file already holds content.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            if file.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    
+    with atomic_open(path) as file:
         file.write(content)
+    return True
+
+def _fsync_directory(directory):
+    """Flush a directory entry to disk so that renames into it survive a crash."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on some platforms (e.g. Windows)
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_file(path, content):
+    """Write content to file atomically, skipping the write if the file already holds it."""
+    if not _atomic_write(path, content):
+        print(f"Unchanged: {path}")
+        return False
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
     print(f"Created: {path}")
+    return True
+
+class BulkWriter:
+    """
+    Write many output files concurrently and crash-safely.
+
+    write() queues a file for a bounded pool of worker threads, blocking once
+    max_pending files are waiting so rendered content does not pile up in memory.
+    Each file is written with _atomic_write(). close() waits for the queue to drain,
+    fsyncs every directory that received a file once, and re-raises the first error.
+    Progress is printed at most once every progress_interval seconds.
+    write_seconds sums the time the workers spend in file I/O, and wait_seconds the
+    time write() blocks waiting for a free slot.
+    """
+
+    def __init__(self, max_workers=8, max_pending=64, progress_interval=1.0):
+        _process_umask()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._directories = set()
+        self._errors = []
+        self._last_report = time.monotonic()
+        self.progress_interval = progress_interval
+        self._closed = False
+        self.queued = 0
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_rendered = 0
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def write(self, path, content):
+        """Queue content to be written to path."""
+        if self._errors:
+            raise self._errors[0]
+        size = len(content.encode('utf-8'))
+        started = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.queued += 1
+            self.bytes_rendered += size
+            self.wait_seconds += waited
+        try:
+            self._executor.submit(self._write, path, content)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _write(self, path, content):
+        try:
+            started = time.perf_counter()
+            changed = _atomic_write(path, content)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.write_seconds += elapsed
+                if changed:
+                    self.written += 1
+                    self.bytes_written += len(content.encode('utf-8'))
+                    self._directories.add(os.path.dirname(os.path.abspath(path)))
+                else:
+                    self.unchanged += 1
+                self._report()
+        except Exception as e:
+            with self._lock:
+                self._errors.append(e)
+        finally:
+            self._slots.release()
+
+    def _report(self, final=False):
+        # Called with the lock held
+        now = time.monotonic()
+        if final or now - self._last_report >= self.progress_interval:
+            self._last_report = now
+            done = self.written + self.unchanged
+            print(f"{'Wrote' if final else 'Writing'} {done}/{self.queued} files ({self.unchanged} unchanged)")
+
+    def close(self):
+        """
+        Wait for all queued files, then make their directory entries durable.
+        Only the first call does anything, so close() may be called inside a with block.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        for directory in sorted(self._directories):
+            _fsync_directory(directory)
+        with self._lock:
+            self._report(final=True)
+        if self._errors:
+            raise self._errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Still finish the files already queued, but keep the original error
+            try:
+                self.close()
+            except Exception:
+                pass
+        return False
 
 def extract_task_ids(content):
     """Extract task IDs from content using regex."""
@@ -63,166 +293,362 @@ def extract_task_ids(content):
     pattern = r'\b(T\d+)\b'
     return set(re.findall(pattern, content))
 
-def parse_session_cache(content):
-    """Parse session_cache.md content and extract individual sessions."""
-    sessions = {}
-    
-    # Regex to match task sections
-    # This pattern looks for ### T1: Title format and captures everything until the next section
-    pattern = r'### (T\d+): (.*?)(?=\n## |### |\Z)'
-    matches = re.finditer(pattern, content, re.DOTALL)
-    
-    for match in matches:
-        task_id = match.group(1)
-        title = match.group(2).strip()
-        section_content = match.group(0)
-        
-        # Extract status
-        status_match = re.search(r'\*\*Status:\*\* (.*?) ', section_content)
-        status = status_match.group(1) if status_match else "🔄"
-        
-        # Extract priority
-        priority_match = re.search(r'\*\*Priority:\*\* (.*?)(\n|$)', section_content)
-        priority = priority_match.group(1) if priority_match else "MEDIUM"
-        
-        # Extract dates
-        started_match = re.search(r'\*\*Started:\*\* (.*?)(\n|$|\*\*)', section_content)
-        started = started_match.group(1) if started_match else TIMESTAMP.split()[0]
-        
-        last_match = re.search(r'\*\*Last\*\*: (.*?)(\n|$)', section_content)
-        last = last_match.group(1) if last_match else TIMESTAMP.split()[0]
-        
-        # Extract context
-        context_match = re.search(r'\*\*Context\*\*: (.*?)(\n|$)', section_content)
-        context = context_match.group(1) if context_match else ""
-        
-        # Extract files
-        files_match = re.search(r'\*\*Files\*\*: (.*?)(\n|$)', section_content)
-        files = files_match.group(1) if files_match else ""
-        
-        # Extract progress
-        progress_pattern = r'\*\*Progress\*\*:(.*?)(?=\n\*\*|\Z)'
-        progress_match = re.search(progress_pattern, section_content, re.DOTALL)
-        progress = progress_match.group(1).strip() if progress_match else ""
-        
-        # Create session object
-        sessions[task_id] = {
+# Precompiled patterns shared by the streaming parsers
+TASK_ID_RE = re.compile(r'^T\d+$')
+SECTION_HEADER_RE = re.compile(r'### (T\d+): ')
+
+# Field markers searched for in each section, as (field, marker, kind). The kinds mirror
+# the value rules of the original per-field regexes:
+#   word  - up to the next space on the same line
+#   line  - up to the end of the line
+#   bold  - up to the end of the line or the next '**'
+#   block - up to the next line starting with '**' or the end of the section
+SESSION_FIELDS = [
+    ('status', '**Status:** ', 'word'),
+    ('priority', '**Priority:** ', 'line'),
+    ('started', '**Started:** ', 'bold'),
+    ('last_updated', '**Last**: ', 'line'),
+    ('context', '**Context**: ', 'line'),
+    ('files', '**Files**: ', 'line'),
+    ('progress', '**Progress**:', 'block'),
+]
+
+TASK_DETAIL_FIELDS = [
+    ('description', '**Description**: ', 'block'),
+    ('criteria', '**Criteria**: ', 'block'),
+    ('files', '**Files**: ', 'block'),
+    ('notes', '**Notes**: ', 'block'),
+]
+
+def _compile_markers(fields):
+    """Build one alternation regex for a field table and a lookup from marker to field."""
+    pattern = re.compile('|'.join(re.escape(marker) for _, marker, _ in fields))
+    lookup = {marker: (name, kind) for name, marker, kind in fields}
+    return pattern, lookup
+
+SESSION_MARKERS = _compile_markers(SESSION_FIELDS)
+TASK_DETAIL_MARKERS = _compile_markers(TASK_DETAIL_FIELDS)
+
+def read_lines(path):
+    """Yield the lines of a file one at a time, warning if it does not exist."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            yield from file
+    except FileNotFoundError:
+        print(f"Warning: File {path} not found.")
+
+class _SectionScanner:
+    """
+    Accumulate one '### T<n>: ' section piece by piece and extract its fields.
+
+    Pieces are the parts of consecutive lines that belong to the section, so the first
+    piece starts at the section header and every later piece starts at a line start.
+    Each field keeps the value of its first successful match, as re.search would.
+    """
+
+    def __init__(self, task_id, markers):
+        self.task_id = task_id
+        self.pattern, self.lookup = markers
+        self.title_parts = []
+        self.values = {}
+        self.blocks = {}
+        self.open_blocks = []
+        self.first_piece = True
+
+    def feed(self, piece, title_start=0):
+        # A block value ends at the next line that starts with '**'
+        if not self.first_piece and self.open_blocks and piece.startswith('**'):
+            self.open_blocks = []
+        for name in self.open_blocks:
+            self.blocks[name].append(piece)
+
+        if '**' in piece:
+            for match in self.pattern.finditer(piece):
+                name, kind = self.lookup[match.group(0)]
+                if name in self.values:
+                    continue
+                start = match.end()
+                if kind == 'block':
+                    self.values[name] = None
+                    self.blocks[name] = [piece[start:]]
+                    self.open_blocks.append(name)
+                    continue
+                end = piece.find('\n', start)
+                end = len(piece) if end == -1 else end
+                if kind == 'word':
+                    end = piece.find(' ', start, end)
+                    if end == -1:
+                        continue
+                elif kind == 'bold':
+                    bold = piece.find('**', start, end)
+                    end = end if bold == -1 else bold
+                self.values[name] = piece[start:end]
+
+        self.title_parts.append(piece[title_start:])
+        self.first_piece = False
+
+    def finish(self):
+        """Return (task_id, title, fields) with None for fields that were not found."""
+        fields = {}
+        for name, value in self.values.items():
+            fields[name] = ''.join(self.blocks[name]).strip() if name in self.blocks else value
+        return self.task_id, ''.join(self.title_parts).strip(), fields
+
+def iter_session_records(lines):
+    """
+    Parse session_cache.md lines in a single pass and yield one session record per
+    '### T<n>: ' section. A section ends at the next line starting with '## ' or at
+    the next '### ' anywhere in the text.
+    """
+    default_date = TIMESTAMP.split()[0]
+    current = None
+
+    def record(scanner):
+        task_id, title, fields = scanner.finish()
+        def value(name, default):
+            return fields[name] if fields.get(name) is not None else default
+        return {
             'id': task_id,
             'title': title,
-            'status': status,
-            'priority': priority,
-            'started': started,
-            'last_updated': last,
-            'context': context,
-            'files': files,
-            'progress': progress
+            'status': value('status', "🔄"),
+            'priority': value('priority', "MEDIUM"),
+            'started': value('started', default_date),
+            'last_updated': value('last_updated', default_date),
+            'context': value('context', ""),
+            'files': value('files', ""),
+            'progress': value('progress', "")
         }
-    
-    return sessions
 
-def parse_tasks(content):
-    """Parse tasks.md content and extract individual tasks."""
-    tasks = {}
-    
-    # Check if there's any content to parse
-    if not content or len(content.strip()) == 0:
-        print("Warning: tasks.md is empty or not found")
-        return tasks
-    
-    # Extract active tasks table
-    active_tasks_match = re.search(r'## Active Tasks\s+\|.*?\|(.*?)(?=\n\n|\n##|\Z)', content, re.DOTALL)
-    active_tasks_table = active_tasks_match.group(1) if active_tasks_match else ""
-    
-    # Parse active tasks table
-    if active_tasks_table:
-        rows = active_tasks_table.strip().split('\n')
+    for line in lines:
+        if current is not None and line.startswith('## '):
+            yield record(current)
+            current = None
+
+        position = 0
+        while True:
+            if current is None:
+                header = SECTION_HEADER_RE.search(line, position)
+                if not header:
+                    break
+                current = _SectionScanner(header.group(1), SESSION_MARKERS)
+                position, title_start = header.start(), header.end() - header.start()
+                search_from = header.end()
+            else:
+                title_start = 0
+                search_from = position
+
+            end = line.find('### ', search_from)
+            if end == -1:
+                current.feed(line[position:], title_start)
+                break
+            current.feed(line[position:end], title_start)
+            yield record(current)
+            current = None
+            position = end
+
+    if current is not None:
+        yield record(current)
+
+class _TableScanner:
+    """
+    Find the first markdown table introduced by a heading such as '## Active Tasks'
+    and yield its data rows, line by line.
+
+    Mirrors the pattern heading + whitespace + '|first cell|' + rows, where the rows run
+    until a blank line, a line starting with '##' or the end of the file.
+    """
+
+    def __init__(self, heading):
+        self.heading = heading
+        self.state = 'heading'
+        self.row = None
+
+    def feed(self, line):
+        """Consume one line and return the completed table rows it contains."""
+        rows = []
+        text = line
+        while text:
+            if self.state == 'heading':
+                index = text.find(self.heading)
+                if index == -1:
+                    break
+                rest = text[index + len(self.heading):]
+                if rest and rest[0].isspace() and (rest.lstrip() == '' or rest.lstrip()[0] == '|'):
+                    self.state = 'spacing'
+                    text = rest
+                else:
+                    text = text[index + 1:]
+            elif self.state == 'spacing':
+                stripped = text.lstrip()
+                if not stripped:
+                    break
+                if stripped[0] != '|':
+                    # Not a table after all; look for the heading again from here
+                    self.state = 'heading'
+                    continue
+                self.state = 'first_cell'
+                text = stripped[1:]
+            elif self.state == 'first_cell':
+                index = text.find('|')
+                if index == -1:
+                    break
+                self.state = 'rows'
+                self.row = text[index + 1:]
+                break
+            elif self.state == 'rows':
+                if text.startswith('\n') or text.startswith('##'):
+                    self.state = 'done'
+                else:
+                    rows.append(self.row)
+                    self.row = text
+                break
+            else:
+                break
+
+        if self.state == 'done' and self.row is not None:
+            rows.append(self.row)
+            self.row = None
+        return [row.rstrip('\n') for row in rows]
+
+    def close(self):
+        """Return the last row when the table runs to the end of the file."""
+        if self.state == 'rows' and self.row is not None:
+            self.state = 'done'
+            row, self.row = self.row, None
+            return [row.rstrip('\n')]
+        return []
+
+def _table_cells(row, min_cells):
+    """Split a table row into stripped cells, or return None for rows to skip."""
+    if not (row.strip() and '|' in row):
+        return None
+    cells = [cell.strip() for cell in row.split('|')]
+    if len(cells) < min_cells:
+        return None
+    # Skip header row or separator row
+    if all(c.startswith('-') for c in cells if c) or 'ID' in cells[1]:
+        return None
+    # Validate that task_id follows the expected format (T followed by digits)
+    if not TASK_ID_RE.match(cells[1]):
+        print(f"Skipping invalid task ID: {cells[1]}")
+        return None
+    return cells
+
+def iter_task_records(lines, active_table=None, completed_table=None):
+    """
+    Parse tasks.md lines in a single pass and yield task records as they are found.
+
+    Records carry a 'kind': 'active' and 'completed' for rows of the first Active Tasks
+    and Completed Tasks tables, and 'details' for each '### T<n>: ' section, which runs
+    until the next line starting with '###'. merge_task_records() combines them.
+    The table scanners may be passed in to inspect their state afterwards.
+    """
+    default_date = TIMESTAMP.split()[0]
+    active_table = active_table or _TableScanner('## Active Tasks')
+    completed_table = completed_table or _TableScanner('## Completed Tasks')
+    current = None
+    has_content = False
+
+    def active_records(rows):
         for row in rows:
-            if row.strip() and '|' in row:
-                cells = [cell.strip() for cell in row.split('|')]
-                if len(cells) >= 6:  # Ensure we have enough cells
-                    # Skip header row or separator row
-                    if all(c.startswith('-') for c in cells if c) or 'ID' in cells[1]:
-                        continue
-                    
-                    task_id = cells[1]
-                    # Validate that task_id follows the expected format (T followed by digits)
-                    if not re.match(r'^T\d+$', task_id):
-                        print(f"Skipping invalid task ID: {task_id}")
-                        continue
-                        
-                    title = cells[2]
-                    status = cells[3]
-                    priority = cells[4]
-                    started = cells[5]
-                    dependencies = cells[6] if len(cells) > 6 else "-"
-                    
-                    tasks[task_id] = {
-                        'id': task_id,
-                        'title': title,
-                        'status': status,
-                        'priority': priority,
-                        'started': started,
-                        'dependencies': dependencies,
-                        'completed': None,
-                        'description': "",
-                        'criteria': "",
-                        'files': "",
-                        'notes': ""
-                    }
-    
-    # Extract completed tasks table
-    completed_tasks_match = re.search(r'## Completed Tasks\s+\|.*?\|(.*?)(?=\n\n|\n##|\Z)', content, re.DOTALL)
-    completed_tasks_table = completed_tasks_match.group(1) if completed_tasks_match else ""
-    
-    # Parse completed tasks table
-    if completed_tasks_table:
-        rows = completed_tasks_table.strip().split('\n')
+            cells = _table_cells(row, 6)
+            if cells:
+                yield {
+                    'kind': 'active',
+                    'id': cells[1],
+                    'title': cells[2],
+                    'status': cells[3],
+                    'priority': cells[4],
+                    'started': cells[5],
+                    'dependencies': cells[6] if len(cells) > 6 else "-"
+                }
+
+    def completed_records(rows):
         for row in rows:
-            if row.strip() and '|' in row:
-                cells = [cell.strip() for cell in row.split('|')]
-                if len(cells) >= 3:  # Ensure we have enough cells
-                    # Skip header row or separator row
-                    if all(c.startswith('-') for c in cells if c) or 'ID' in cells[1]:
-                        continue
-                        
-                    task_id = cells[1]
-                    # Validate that task_id follows the expected format (T followed by digits)
-                    if not re.match(r'^T\d+$', task_id):
-                        print(f"Skipping invalid task ID: {task_id}")
-                        continue
-                        
-                    title = cells[2]
-                    completed = cells[3] if len(cells) > 3 else TIMESTAMP.split()[0]
-                    
-                    tasks[task_id] = {
-                        'id': task_id,
-                        'title': title,
-                        'status': "✅",
-                        'priority': "COMPLETED",
-                        'started': "",
-                        'dependencies': "",
-                        'completed': completed,
-                        'description': "",
-                        'criteria': "",
-                        'files': "",
-                        'notes': ""
-                    }
-    
-    # Extract task details
-    details_pattern = r'### (T\d+): (.*?)(?=\n###|\Z)'
-    details_matches = re.finditer(details_pattern, content, re.DOTALL)
-    
-    for match in details_matches:
-        task_id = match.group(1)
-        
-        # Validate that task_id follows the expected format (T followed by digits)
-        if not re.match(r'^T\d+$', task_id):
-            print(f"Skipping invalid task ID in details section: {task_id}")
-            continue
-            
-        title = match.group(2).strip()
-        detail_content = match.group(0)
-        
+            cells = _table_cells(row, 3)
+            if cells:
+                yield {
+                    'kind': 'completed',
+                    'id': cells[1],
+                    'title': cells[2],
+                    'completed': cells[3] if len(cells) > 3 else default_date
+                }
+
+    def details_record(scanner):
+        task_id, title, fields = scanner.finish()
+        return dict(kind='details', id=task_id, title=title,
+                    **{name: fields.get(name) for name, _, _ in TASK_DETAIL_FIELDS})
+
+    for line in lines:
+        has_content = has_content or bool(line.strip())
+
+        yield from active_records(active_table.feed(line))
+        yield from completed_records(completed_table.feed(line))
+
+        if current is not None and line.startswith('###'):
+            yield details_record(current)
+            current = None
+        if current is None:
+            header = SECTION_HEADER_RE.search(line)
+            if header:
+                current = _SectionScanner(header.group(1), TASK_DETAIL_MARKERS)
+                current.feed(line[header.start():], header.end() - header.start())
+        else:
+            current.feed(line)
+
+    if not has_content:
+        print("Warning: tasks.md is empty or not found")
+        return
+
+    yield from active_records(active_table.close())
+    yield from completed_records(completed_table.close())
+    if current is not None:
+        yield details_record(current)
+
+def merge_task_records(records):
+    """
+    Combine records from iter_task_records() into a dictionary of tasks.
+    Table rows are applied before detail sections, active rows before completed rows.
+    """
+    default_date = TIMESTAMP.split()[0]
+    by_kind = {'active': [], 'completed': [], 'details': []}
+    for record in records:
+        by_kind[record['kind']].append(record)
+
+    tasks = {}
+    for record in by_kind['active']:
+        tasks[record['id']] = {
+            'id': record['id'],
+            'title': record['title'],
+            'status': record['status'],
+            'priority': record['priority'],
+            'started': record['started'],
+            'dependencies': record['dependencies'],
+            'completed': None,
+            'description': "",
+            'criteria': "",
+            'files': "",
+            'notes': ""
+        }
+
+    for record in by_kind['completed']:
+        tasks[record['id']] = {
+            'id': record['id'],
+            'title': record['title'],
+            'status': "✅",
+            'priority': "COMPLETED",
+            'started': "",
+            'dependencies': "",
+            'completed': record['completed'],
+            'description': "",
+            'criteria': "",
+            'files': "",
+            'notes': ""
+        }
+
+    for record in by_kind['details']:
+        task_id, title = record['id'], record['title']
+
         # If task wasn't in the tables, add it now
         if task_id not in tasks:
             tasks[task_id] = {
@@ -230,7 +656,7 @@ def parse_tasks(content):
                 'title': title,
                 'status': "🔄",  # Default status
                 'priority': "MEDIUM",  # Default priority
-                'started': TIMESTAMP.split()[0],  # Default to current date
+                'started': default_date,  # Default to current date
                 'dependencies': "",
                 'completed': None,
                 'description': "",
@@ -242,63 +668,219 @@ def parse_tasks(content):
             # Update title if it's more detailed
             if title and len(title) > len(tasks[task_id]['title']):
                 tasks[task_id]['title'] = title
-        
-        # Extract description
-        description_match = re.search(r'\*\*Description\*\*: (.*?)(?=\n\*\*|\Z)', detail_content, re.DOTALL)
-        if description_match:
-            tasks[task_id]['description'] = description_match.group(1).strip()
-        
-        # Extract criteria
-        criteria_match = re.search(r'\*\*Criteria\*\*: (.*?)(?=\n\*\*|\Z)', detail_content, re.DOTALL)
-        if criteria_match:
-            tasks[task_id]['criteria'] = criteria_match.group(1).strip()
-        
-        # Extract files
-        files_match = re.search(r'\*\*Files\*\*: (.*?)(?=\n\*\*|\Z)', detail_content, re.DOTALL)
-        if files_match:
-            tasks[task_id]['files'] = files_match.group(1).strip()
-        
-        # Extract notes
-        notes_match = re.search(r'\*\*Notes\*\*: (.*?)(?=\n\*\*|\Z)', detail_content, re.DOTALL)
-        if notes_match:
-            tasks[task_id]['notes'] = notes_match.group(1).strip()
-    
+
+        for name, _, _ in TASK_DETAIL_FIELDS:
+            if record[name] is not None:
+                tasks[task_id][name] = record[name]
+
     return tasks
 
-def create_session_file(session_data):
-    """Create individual session file from template and data."""
-    template = read_file(SESSION_TEMPLATE_PATH)
-    
-    # Replace template placeholders with actual data
-    content = template
-    content = content.replace("[Task ID]", session_data['id'])
-    content = content.replace("[Creation Date]", session_data['started'])
-    content = content.replace("[Last Update Date]", session_data['last_updated'])
-    content = content.replace("[Task Title]", session_data['title'])
-    content = content.replace("[Status Icon: 🔄 (Active), ⏸️ (Paused), ✅ (Completed)]", session_data['status'])
-    content = content.replace("[HIGH/MEDIUM/LOW]", session_data['priority'])
-    content = content.replace("[Start Date]", session_data['started'])
-    content = content.replace("[Brief description of current focus]", session_data['context'])
-    
-    # Handle progress
-    if session_data['progress']:
-        content = content.replace("1. ✅ [Completed Step]\n2. ✅ [Completed Step]\n3. 🔄 [Current Step]\n4. ⬜ [Planned Step]\n5. ⬜ [Planned Step]", session_data['progress'])
-    
-    # Handle files
-    if session_data['files']:
-        file_lines = []
-        files = session_data['files'].replace('`', '').split(',')
-        for file in files:
-            file = file.strip()
-            if file:
-                file_lines.append(f"- `{file}`: [Related to {session_data['id']}]")
-        
-        content = content.replace("- `[file path]`: [Brief description of relevance]\n- `[file path]`: [Brief description of relevance]", "\n".join(file_lines))
-    
-    # Add a session history entry for today
+def parse_session_cache(content):
+    """Parse session_cache.md content and extract individual sessions."""
+    sessions = {}
+    for session in iter_session_records(io.StringIO(content)):
+        sessions[session['id']] = session
+    return sessions
+
+def parse_tasks(content):
+    """Parse tasks.md content and extract individual tasks."""
+    return merge_task_records(iter_task_records(io.StringIO(content)))
+
+# Template placeholders as (name, placeholder text), in the order they are substituted.
+# A placeholder containing text already claimed by an earlier one never matches.
+SESSION_TEMPLATE_FIELDS = (
+    ('id', "[Task ID]"),
+    ('created', "[Creation Date]"),
+    ('last_updated', "[Last Update Date]"),
+    ('title', "[Task Title]"),
+    ('status', "[Status Icon: 🔄 (Active), ⏸️ (Paused), ✅ (Completed)]"),
+    ('priority', "[HIGH/MEDIUM/LOW]"),
+    ('started', "[Start Date]"),
+    ('context', "[Brief description of current focus]"),
+    ('progress', "1. ✅ [Completed Step]\n2. ✅ [Completed Step]\n3. 🔄 [Current Step]\n4. ⬜ [Planned Step]\n5. ⬜ [Planned Step]"),
+    ('files', "- `[file path]`: [Brief description of relevance]\n- `[file path]`: [Brief description of relevance]"),
+    ('history_title', "### [Date] - [Brief description of session]"),
+    ('history', "- [Work completed]\n- [Decisions made]\n- [Issues encountered]"),
+)
+
+TASK_TEMPLATE_FIELDS = (
+    ('id', "[Task ID]"),
+    ('created', "[Creation Date]"),
+    ('last_updated', "[Last Update Date]"),
+    ('title', "[Task Title]"),
+    ('status', "[Status Icon: 🔄 (Active), ⏸️ (Paused), ✅ (Completed)]"),
+    ('priority', "[HIGH/MEDIUM/LOW]"),
+    ('started', "[Start Date]"),
+    ('completed', "[Completion Date if applicable]"),
+    ('description', "[Detailed description of the task, including purpose and goals]"),
+    ('criteria', "- [ ] [Criterion 1]\n- [ ] [Criterion 2]\n- [ ] [Criterion 3]"),
+    ('files', "- `[file path]`: [Brief description of relevance]\n- `[file path]`: [Brief description of relevance]"),
+    ('dependencies', "- **Depends On:** [Task IDs this task depends on]"),
+    ('notes', "- [Important note about the task]\n- [Key insight or decision made]"),
+    ('progress', "- [Date]: [Progress update]"),
+)
+
+MASTER_SESSION_TEMPLATE_FIELDS = (
+    ('timestamp', "[Timestamp]"),
+    ('count', "[Count]"),
+    ('active_count', "- **Active Sessions:** [Count]"),
+    ('paused_count', "- **Paused Sessions:** [Count]"),
+    ('current_focus', "- **Current Focus:** [Task ID]"),
+    ('last_update', "- **Last Session Update:** [Timestamp]"),
+    ('registry', "| T1 | [Brief Title] | 🔄 | HIGH | [sessions/T1_2025-04-21.md] |\n| T2 | [Brief Title] | 🔄 | MEDIUM | [sessions/T2_2025-04-20.md] |\n| T3 | [Brief Title] | ⏸️ | LOW | [sessions/T3_2025-04-18.md] |\n| T4 | [Brief Title] | ✅ | HIGH | [sessions/T4_2025-04-15.md] |"),
+    ('active_tasks', "- **T1:** 🔄 [Current step brief] - Updated [date]\n- **T2:** 🔄 [Current step brief] - Updated [date]"),
+    ('paused_tasks', "- **T3:** ⏸️ [Reason for pause] - Paused [date]"),
+    ('last_focus', "- Last session focused on [Task ID]"),
+    ('next_focus', "- Next planned focus: [Task ID]"),
+    ('blockers', "- Critical blockers: [Brief description if any]"),
+    ('commands', "[Recent command]\n[Recent command]"),
+    ('links', "## Links Between Tasks\n- T1 → T3: [Brief description of relationship]\n- T2 → T4: [Brief description of relationship]"),
+)
+
+MASTER_TASK_TEMPLATE_FIELDS = (
+    ('timestamp', "[Timestamp]"),
+    ('active_count', "- **Active Tasks:** [Count]"),
+    ('paused_count', "- **Paused Tasks:** [Count]"),
+    ('completed_count', "- **Completed Tasks:** [Count]"),
+    ('latest_task_id', "- **Latest Task ID:** [Task ID]"),
+    ('active_header', "### Active Tasks\n| ID | Title | Status | Priority | Created | Task File |"),
+    ('active_table', "| T1 | [Brief Title] | 🔄 | HIGH | [Date] | [tasks/T1.md] |\n| T2 | [Brief Title] | 🔄 | MEDIUM | [Date] | [tasks/T2.md] |\n| T3 | [Brief Title] | ⏸️ | LOW | [Date] | [tasks/T3.md] |"),
+    ('completed_table', "| T0 | [Brief Title] | [Date] | [tasks/T0.md] |"),
+    ('dependencies', "- **T1** → Blocks → **T3**\n- **T2** → Depends on → **T0**"),
+    ('priority_queue', "1. **T1**: [Brief reason for priority]\n2. **T2**: [Brief reason for priority]\n3. **T3**: [Brief reason for priority]"),
+    ('updates', "- [Date]: Created task **T3** - [Brief description]\n- [Date]: Completed task **T0** - [Brief description]\n- [Date]: Updated priority for task **T1** - [Brief reason]"),
+)
+
+class CompiledTemplate:
+    """
+    A template parsed once into literal text and named placeholder slots.
+
+    render() fills all slots in a single join instead of copying the document once per
+    placeholder. A slot whose value is None keeps its placeholder text, so optional
+    sections fall back to the example content of the template.
+    """
+
+    def __init__(self, text, fields):
+        segments = [text]
+        for name, placeholder in fields:
+            split_segments = []
+            for segment in segments:
+                if not isinstance(segment, str):
+                    split_segments.append(segment)
+                    continue
+                pieces = segment.split(placeholder)
+                for i, piece in enumerate(pieces):
+                    if i:
+                        split_segments.append((name, placeholder))
+                    if piece:
+                        split_segments.append(piece)
+            segments = split_segments
+        self.segments = segments
+        self.digest = content_hash(text)
+
+    def render(self, values):
+        """Return the template text with each slot replaced by values[name]."""
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+            else:
+                value = values.get(segment[0])
+                parts.append(segment[1] if value is None else value)
+        return ''.join(parts)
+
+@lru_cache(maxsize=None)
+def load_template(path, fields):
+    """Read and compile a template once; later calls reuse the compiled template."""
+    return CompiledTemplate(read_file(path), fields)
+
+class DryRunWriter:
+    """Stand-in for BulkWriter that counts what would be written and writes nothing."""
+
+    def __init__(self):
+        self.queued = 0
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_rendered = 0
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def write(self, path, content):
+        self.queued += 1
+        self.bytes_rendered += len(content.encode('utf-8'))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+class RunReport:
+    """
+    Phase timings and I/O counters of one run, reported as JSON. Phases are wall-clock
+    seconds, except write, which sums the file I/O time of all writer threads.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block and add it to the named phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def as_dict(self):
+        return {
+            'timestamp': TIMESTAMP,
+            'phases': dict(self.phases, total=time.perf_counter() - self._started),
+            **self.counters,
+        }
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _file_paths(files):
+    """Split a comma-separated, possibly backquoted file list into paths."""
+    return [file.strip() for file in files.replace('`', '').split(',') if file.strip()]
+
+def _file_lines(files, task_id):
+    """Format a comma-separated file list as markdown list items."""
+    return "\n".join(f"- `{file}`: [Related to {task_id}]" for file in _file_paths(files))
+
+def create_session_file(session_data, write=write_file):
+    """Create individual session file from template and data, written with write(path, content)."""
+    template = load_template(SESSION_TEMPLATE_PATH, SESSION_TEMPLATE_FIELDS)
     today = TIMESTAMP.split()[0]
-    content = content.replace("### [Date] - [Brief description of session]", f"### {today} - Initial session file creation")
-    content = content.replace("- [Work completed]\n- [Decisions made]\n- [Issues encountered]", "- Converted from monolithic session cache\n- Created modular session file")
+    
+    content = template.render({
+        'id': session_data['id'],
+        'created': session_data['started'],
+        'last_updated': session_data['last_updated'],
+        'title': session_data['title'],
+        'status': session_data['status'],
+        'priority': session_data['priority'],
+        'started': session_data['started'],
+        'context': session_data['context'],
+        # Optional sections keep the template example when there is no data
+        'progress': session_data['progress'] or None,
+        'files': _file_lines(session_data['files'], session_data['id']) if session_data['files'] else None,
+        # Add a session history entry for today
+        'history_title': f"### {today} - Initial session file creation",
+        'history': "- Converted from monolithic session cache\n- Created modular session file",
+    })
     
     # Use last_updated date from session data, fallback to started date, then today
     session_date = (
@@ -309,332 +891,1134 @@ def create_session_file(session_data):
     filename = f"{session_data['id']}_{session_date.replace('-', '')}.md"
     filepath = SESSIONS_DIR / filename
     
-    write_file(filepath, content)
+    write(filepath, content)
     return filename
 
-def create_task_file(task_data):
-    """Create individual task file from template and data."""
-    template = read_file(TASK_TEMPLATE_PATH)
-    
-    # Replace template placeholders with actual data
-    content = template
-    content = content.replace("[Task ID]", task_data['id'])
-    content = content.replace("[Creation Date]", task_data['started'])
-    content = content.replace("[Last Update Date]", TIMESTAMP)
-    content = content.replace("[Task Title]", task_data['title'])
-    content = content.replace("[Status Icon: 🔄 (Active), ⏸️ (Paused), ✅ (Completed)]", task_data['status'])
-    content = content.replace("[HIGH/MEDIUM/LOW]", task_data['priority'])
-    content = content.replace("[Start Date]", task_data['started'])
-    
-    # Handle completion date
-    if task_data['completed']:
-        content = content.replace("[Completion Date if applicable]", task_data['completed'])
-    else:
-        content = content.replace("[Completion Date if applicable]", "N/A")
-    
-    # Handle description
-    if task_data['description']:
-        content = content.replace("[Detailed description of the task, including purpose and goals]", task_data['description'])
-    
-    # Handle criteria
-    if task_data['criteria']:
-        criteria_lines = []
-        criteria_items = task_data['criteria'].split(',')
-        for item in criteria_items:
-            item = item.strip()
-            if item:
-                criteria_lines.append(f"- [ ] {item}")
-        
-        if criteria_lines:
-            content = content.replace("- [ ] [Criterion 1]\n- [ ] [Criterion 2]\n- [ ] [Criterion 3]", "\n".join(criteria_lines))
-    
-    # Handle files
-    if task_data['files']:
-        file_lines = []
-        files = task_data['files'].replace('`', '').split(',')
-        for file in files:
-            file = file.strip()
-            if file:
-                file_lines.append(f"- `{file}`: [Related to {task_data['id']}]")
-        
-        content = content.replace("- `[file path]`: [Brief description of relevance]\n- `[file path]`: [Brief description of relevance]", "\n".join(file_lines))
-    
-    # Handle dependencies
-    if task_data['dependencies'] and task_data['dependencies'] != "-":
-        content = content.replace("- **Depends On:** [Task IDs this task depends on]", f"- **Depends On:** {task_data['dependencies']}")
-    
-    # Handle notes
-    if task_data['notes']:
-        note_lines = []
-        notes_items = task_data['notes'].split('\n')
-        for item in notes_items:
-            item = item.strip()
-            if item:
-                note_lines.append(f"- {item}")
-        
-        if note_lines:
-            content = content.replace("- [Important note about the task]\n- [Key insight or decision made]", "\n".join(note_lines))
-    
-    # Add today's date to progress tracking
-    today = TIMESTAMP.split()[0]
-    content = content.replace("- [Date]: [Progress update]", f"- {today}: Created individual task file")
+def create_task_file(task_data, write=write_file):
+    """Create individual task file from template and data, written with write(path, content)."""
+    template = load_template(TASK_TEMPLATE_PATH, TASK_TEMPLATE_FIELDS)
+    
+    # Format criteria as a checklist
+    criteria_lines = [f"- [ ] {item.strip()}" for item in task_data['criteria'].split(',') if item.strip()]
+    
+    # Format notes as a list
+    note_lines = [f"- {item.strip()}" for item in task_data['notes'].split('\n') if item.strip()]
+    
+    has_dependencies = task_data['dependencies'] and task_data['dependencies'] != "-"
+    
+    content = template.render({
+        'id': task_data['id'],
+        'created': task_data['started'],
+        'last_updated': TIMESTAMP,
+        'title': task_data['title'],
+        'status': task_data['status'],
+        'priority': task_data['priority'],
+        'started': task_data['started'],
+        'completed': task_data['completed'] or "N/A",
+        # Optional sections keep the template example when there is no data
+        'description': task_data['description'] or None,
+        'criteria': "\n".join(criteria_lines) if criteria_lines else None,
+        'files': _file_lines(task_data['files'], task_data['id']) if task_data['files'] else None,
+        'dependencies': f"- **Depends On:** {task_data['dependencies']}" if has_dependencies else None,
+        'notes': "\n".join(note_lines) if note_lines else None,
+        # Add today's date to progress tracking
+        'progress': f"- {TIMESTAMP.split()[0]}: Created individual task file",
+    })
     
     # Generate filename
     filename = f"{task_data['id']}.md"
     filepath = TASKS_DIR / filename
     
-    write_file(filepath, content)
+    write(filepath, content)
     return filename
 
-def create_master_session_file(sessions):
-    """Create master session cache file from template and data."""
-    template = read_file(MASTER_SESSION_TEMPLATE_PATH)
+class SortedView:
+    """
+    The records matching a predicate, kept sorted by key as records are added and
+    removed, each with a pre-rendered row.
+
+    Ties keep the order of the records in their source file, like a stable sort; with
+    reverse the keys run from largest to smallest, again with ties in file order.
+    """
+
+    def __init__(self, predicate, key, row, reverse=False):
+        self.predicate = predicate
+        self.key = key
+        self.row = row
+        self.reverse = reverse
+        self._entries = []
+        self._rows = {}
+
+    def add(self, record_id, record, position):
+        if not self.predicate(record):
+            return
+        entry = (self.key(record), -position if self.reverse else position, record_id)
+        insort(self._entries, entry)
+        self._rows[record_id] = (entry, self.row(record))
+
+    def remove(self, record_id):
+        if record_id not in self._rows:
+            return
+        entry, _ = self._rows.pop(record_id)
+        del self._entries[bisect_left(self._entries, entry)]
+
+    def ids(self):
+        """Return the record IDs in view order."""
+        entries = reversed(self._entries) if self.reverse else self._entries
+        return [record_id for _, _, record_id in entries]
+
+    def rows(self, limit=None):
+        """Return the rendered rows in view order, optionally only the first limit."""
+        return [self._rows[record_id][1] for record_id in self.ids()[:limit]]
+
+class Aggregates:
+    """
+    Status counts and sorted views over a set of records, maintained incrementally.
+
+    Subclasses define COUNTS as {name: predicate} and make_views() returning
+    {name: SortedView}. update() only touches the records that changed. When records
+    were added, removed or reordered, the positions and views are rebuilt from the
+    records in memory and layout_changed is set, but only new and edited records are
+    reported as changed.
+    """
+
+    COUNTS = {}
+
+    def __init__(self):
+        self.records = {}
+        self.positions = {}
+        self.counts = Counter()
+        self.views = self.make_views()
+        self.layout_changed = False
+
+    def make_views(self):
+        return {}
+
+    def _apply(self, record_id, record, sign):
+        for name, predicate in self.COUNTS.items():
+            if predicate(record):
+                self.counts[name] += sign
+        for view in self.views.values():
+            if sign > 0:
+                view.add(record_id, record, self.positions[record_id])
+            else:
+                view.remove(record_id)
+
+    def update(self, records):
+        """
+        Bring the aggregates in line with records and return the IDs of the records
+        that are new or differ from the previous update.
+        """
+        changed = [record_id for record_id, record in records.items() if self.records.get(record_id) != record]
+        self.layout_changed = len(records) != len(self.positions) or any(
+            self.positions.get(record_id) != i for i, record_id in enumerate(records))
+        
+        if self.layout_changed:
+            # Positions break ties in the views, so shifted records are re-added
+            self.records = dict(records)
+            self.positions = {record_id: i for i, record_id in enumerate(records)}
+            self.counts = Counter()
+            self.views = self.make_views()
+            for record_id, record in records.items():
+                self._apply(record_id, record, 1)
+            return changed
+        
+        for record_id in changed:
+            self._apply(record_id, self.records[record_id], -1)
+            self.records[record_id] = records[record_id]
+            self._apply(record_id, records[record_id], 1)
+        return changed
+
+def _short_title(text, width=40):
+    """Put text on one line and truncate it to width characters with an ellipsis."""
+    text = text.replace('\n', ' ').strip()  # Remove line breaks
+    if len(text) > width:  # Truncate long titles but maintain table alignment
+        text = f"{text[:width - 3]}…"  # Use single character ellipsis
+    return text
+
+def _is_active(record):
+    return '🔄' in record['status'] or 'IN PROGRESS' in record['status']
+
+def _is_paused(record):
+    return '⏸️' in record['status'] or 'PAUSED' in record['status']
+
+def _is_completed(record):
+    return '✅' in record['status'] or 'COMPLETE' in record['status']
+
+def _session_registry_row(session):
+    filename = f"{session['id']}_{session['last_updated'].replace('-', '')}.md"
+    return f"| {session['id']} | {_short_title(session['title'])} | {session['status']} | {session['priority']} | [sessions/{filename}] |"
+
+def _session_active_row(session):
+    status = '🔄' if 'IN PROGRESS' in session['status'] else session['status']
+    context = _short_title(session.get('context', ''))
+    last_updated = session.get('last_updated', '') or session.get('started', '')
+    return f"- **{session['id']}:** {status} {context} - Updated {last_updated}"
+
+class SessionAggregates(Aggregates):
+    """Counts and views behind the master session cache file."""
+
+    COUNTS = {'active': _is_active, 'paused': _is_paused}
+
+    def make_views(self):
+        return {
+            # Most recently updated active session
+            'focus': SortedView(_is_active, lambda s: s['last_updated'], lambda s: s['id'], reverse=True),
+            'registry': SortedView(lambda s: True, lambda s: s['id'], _session_registry_row),
+            # Active and paused sessions, most recently updated first
+            'active': SortedView(_is_active, lambda s: s.get('last_updated', '') or s.get('started', ''),
+                                 _session_active_row, reverse=True),
+            'paused': SortedView(lambda s: s['status'] == '⏸️', lambda s: s['last_updated'],
+                                 lambda s: f"- **{s['id']}:** ⏸️ Paused - {s['last_updated']}", reverse=True),
+        }
+
+def _task_active_row(task):
+    # Normalize status to just show emoji
+    status = task['status']
+    if 'IN PROGRESS' in status:
+        status = '🔄'
+    elif 'COMPLETE' in status:
+        status = '✅'
+    elif 'PAUSED' in status:
+        status = '⏸️'
+    return f"| {task['id']} | {_short_title(task['title'])} | {status} | {task['priority']} | {task['started']} | [tasks/{task['id']}.md] |"
+
+def _task_priority_row(task):
+    title = task['title']
+    if len(title) > 30:  # Truncate long titles
+        title = title[:27] + "..."
+    return f"**{task['id']}**: {title}"
+
+class TaskAggregates(Aggregates):
+    """Counts and views behind the master tasks file."""
+
+    COUNTS = {'active': _is_active, 'paused': _is_paused, 'completed': _is_completed}
+
+    def make_views(self):
+        return {
+            # Only consider valid task IDs (T followed by a number) for the latest ID
+            'numbers': SortedView(lambda t: TASK_ID_RE.match(t['id']), lambda t: int(t['id'][1:]), lambda t: t['id']),
+            'active': SortedView(lambda t: t['status'] != '✅', lambda t: t['id'], _task_active_row),
+            # Completed tasks, most recent completion first
+            'completed': SortedView(
+                lambda t: t['status'] == '✅', lambda t: t['completed'] if t['completed'] else "",
+                lambda t: f"| {t['id']} | {_short_title(t['title'])} | {t['completed']} | [tasks/{t['id']}.md] |",
+                reverse=True),
+            # Dependencies of active tasks, in file order
+            'dependencies': SortedView(
+                lambda t: t['status'] != '✅' and t['dependencies'] and t['dependencies'] != "-", lambda t: 0,
+                lambda t: f"- **{t['id']}** → Depends on → **{t['dependencies']}**"),
+            'priority': SortedView(lambda t: t['status'] == '🔄',
+                                   lambda t: {"HIGH": 0, "MEDIUM": 1, "LOW": 2}.get(t['priority'], 3),
+                                   _task_priority_row),
+        }
+
+def create_master_session_file(sessions, write=write_file, aggregates=None):
+    """
+    Create master session cache file from template and data, written with write(path, content).
+    aggregates may be a SessionAggregates already up to date with sessions.
+    """
+    template = load_template(MASTER_SESSION_TEMPLATE_PATH, MASTER_SESSION_TEMPLATE_FIELDS)
+    if aggregates is None:
+        aggregates = SessionAggregates()
+        aggregates.update(sessions)
+    views = aggregates.views
     
     # Count sessions by status (handle both emoji and text variants)
-    active_count = sum(1 for s in sessions.values() if '🔄' in s['status'] or 'IN PROGRESS' in s['status'])
-    paused_count = sum(1 for s in sessions.values() if '⏸️' in s['status'] or 'PAUSED' in s['status'])
+    active_count = aggregates.counts['active']
+    paused_count = aggregates.counts['paused']
     
     # Get current focus (most recently updated active session)
-    active_sessions = [s for s in sessions.values() if '🔄' in s['status'] or 'IN PROGRESS' in s['status']]
-    current_focus = max(active_sessions, key=lambda s: s['last_updated'])['id'] if active_sessions else "None"
-    
-    # Generate session registry table
-    registry_rows = []
-    for task_id, session in sorted(sessions.items()):
-        filename = f"{task_id}_{session['last_updated'].replace('-', '')}.md"
-        
-        # Clean and format title consistently
-        title = session['title'].replace('\n', ' ').strip()  # Remove line breaks
-        if len(title) > 40:  # Truncate long titles but maintain table alignment
-            title = f"{title[:37]}…"  # Use single character ellipsis
-            
-        registry_rows.append(f"| {task_id} | {title} | {session['status']} | {session['priority']} | [sessions/{filename}] |")
-    
-    # Show all sessions
-    registry_table = "\n".join(registry_rows)
-    
-    # Generate quick status sections - show all active sessions
-    active_tasks = []
-    active_sessions_list = [
-        (task_id, session) for task_id, session in sessions.items() 
-        if '🔄' in session['status'] or 'IN PROGRESS' in session['status']
-    ]
-    # Sort by last updated (most recent first)
-    active_sessions_list.sort(key=lambda x: x[1].get('last_updated', '') or x[1].get('started', ''), reverse=True)
-    
-    for task_id, session in active_sessions_list:
-        status = '🔄' if 'IN PROGRESS' in session['status'] else session['status']
-        context = session.get('context', '').replace('\n', ' ').strip()
-        if len(context) > 40:
-            context = f"{context[:37]}…"
-        last_updated = session.get('last_updated', '') or session.get('started', '')
-        active_tasks.append(f"- **{task_id}:** {status} {context} - Updated {last_updated}")
-    
-    paused_tasks = []
-    paused_sessions_list = [(task_id, session) for task_id, session in sessions.items() if session['status'] == '⏸️']
-    # Sort by last updated (most recent first)
-    paused_sessions_list.sort(key=lambda x: x[1]['last_updated'], reverse=True)
-    
-    for task_id, session in paused_sessions_list:  # Show all paused tasks
-        paused_tasks.append(f"- **{task_id}:** ⏸️ Paused - {session['last_updated']}")
-    
-    # Replace template placeholders
-    content = template
-    content = content.replace("[Timestamp]", TIMESTAMP)
-    content = content.replace("[Count]", str(active_count))
-    content = content.replace("- **Active Sessions:** [Count]", f"- **Active Sessions:** {active_count}")
-    content = content.replace("- **Paused Sessions:** [Count]", f"- **Paused Sessions:** {paused_count}")
-    content = content.replace("- **Current Focus:** [Task ID]", f"- **Current Focus:** {current_focus}")
-    content = content.replace("- **Last Session Update:** [Timestamp]", f"- **Last Session Update:** {TIMESTAMP}")
-    content = content.replace("| T1 | [Brief Title] | 🔄 | HIGH | [sessions/T1_2025-04-21.md] |\n| T2 | [Brief Title] | 🔄 | MEDIUM | [sessions/T2_2025-04-20.md] |\n| T3 | [Brief Title] | ⏸️ | LOW | [sessions/T3_2025-04-18.md] |\n| T4 | [Brief Title] | ✅ | HIGH | [sessions/T4_2025-04-15.md] |", registry_table)
-    
-    # Replace active tasks section
-    if active_tasks:
-        content = content.replace("- **T1:** 🔄 [Current step brief] - Updated [date]\n- **T2:** 🔄 [Current step brief] - Updated [date]", "\n".join(active_tasks))
-    else:
-        content = content.replace("- **T1:** 🔄 [Current step brief] - Updated [date]\n- **T2:** 🔄 [Current step brief] - Updated [date]", "- No active tasks")
-    
-    # Replace paused tasks section
-    if paused_tasks:
-        content = content.replace("- **T3:** ⏸️ [Reason for pause] - Paused [date]", "\n".join(paused_tasks))
-    else:
-        content = content.replace("- **T3:** ⏸️ [Reason for pause] - Paused [date]", "- No paused tasks")
-    
-    # Add session notes
-    content = content.replace("- Last session focused on [Task ID]", f"- Last session focused on {current_focus}")
-    content = content.replace("- Next planned focus: [Task ID]", f"- Next planned focus: {current_focus}")
-    content = content.replace("- Critical blockers: [Brief description if any]", "- No critical blockers identified")
-    
-    # Add command history
-    content = content.replace("[Recent command]\n[Recent command]", "memory_bank_restructure.py  # Restructured memory bank")
-    
-    # Just remove the template text for links between tasks
-    content = content.replace("## Links Between Tasks\n- T1 → T3: [Brief description of relationship]\n- T2 → T4: [Brief description of relationship]",
-                            "## Links Between Tasks\n- See tasks.md for task dependencies")
+    focus = views['focus'].ids()
+    current_focus = focus[0] if focus else "None"
+    
+    active_tasks = views['active'].rows()
+    paused_tasks = views['paused'].rows()
+    
+    content = template.render({
+        'timestamp': TIMESTAMP,
+        'count': str(active_count),
+        'active_count': f"- **Active Sessions:** {active_count}",
+        'paused_count': f"- **Paused Sessions:** {paused_count}",
+        'current_focus': f"- **Current Focus:** {current_focus}",
+        'last_update': f"- **Last Session Update:** {TIMESTAMP}",
+        'registry': "\n".join(views['registry'].rows()),
+        'active_tasks': "\n".join(active_tasks) if active_tasks else "- No active tasks",
+        'paused_tasks': "\n".join(paused_tasks) if paused_tasks else "- No paused tasks",
+        # Add session notes
+        'last_focus': f"- Last session focused on {current_focus}",
+        'next_focus': f"- Next planned focus: {current_focus}",
+        'blockers': "- No critical blockers identified",
+        # Add command history
+        'commands': "memory_bank_restructure.py  # Restructured memory bank",
+        # Just remove the template text for links between tasks
+        'links': "## Links Between Tasks\n- See tasks.md for task dependencies",
+    })
 
     # Create new master session cache file
     master_path = MEMORY_BANK_DIR / "session_cache_new.md"
-    write_file(master_path, content)
+    write(master_path, content)
     return master_path
 
-def create_master_task_file(tasks):
-    """Create master tasks file from template and data."""
-    template = read_file(MASTER_TASK_TEMPLATE_PATH)
-    
-    # Count tasks by status (handle both emoji and text variants)
-    active_count = sum(1 for t in tasks.values() if '🔄' in t['status'] or 'IN PROGRESS' in t['status'])
-    paused_count = sum(1 for t in tasks.values() if '⏸️' in t['status'] or 'PAUSED' in t['status'])
-    completed_count = sum(1 for t in tasks.values() if '✅' in t['status'] or 'COMPLETE' in t['status'])
-    
-    # Find latest task ID - only consider valid task IDs (T followed by a number)
-    valid_task_ids = [tid for tid in tasks.keys() if re.match(r'^T\d+$', tid)]
-    if valid_task_ids:
-        # Extract numbers from task IDs and find the maximum
-        task_numbers = [int(tid[1:]) for tid in valid_task_ids]
-        latest_task_number = max(task_numbers)
-        latest_task_id = f"T{latest_task_number}"
-    else:
-        latest_task_id = "T0"
-    
-    # Generate active tasks table - only include minimal info in the master file
-    active_rows = []
-    for task_id, task in sorted(tasks.items()):
-        if task['status'] != '✅':
-            # Just include task ID, a brief title (truncated if needed), status, and link
-            title = task['title'].replace('\n', ' ').strip()  # Remove line breaks
-            if len(title) > 40:  # Truncate long titles but maintain table alignment
-                title = f"{title[:37]}…"  # Use single character ellipsis
-            # Normalize status to just show emoji
-            status = task['status']
-            if 'IN PROGRESS' in status:
-                status = '🔄'
-            elif 'COMPLETE' in status:
-                status = '✅'
-            elif 'PAUSED' in status:
-                status = '⏸️'
-                
-            active_rows.append(f"| {task_id} | {title} | {status} | {task['priority']} | {task['started']} | [tasks/{task_id}.md] |")
-    
-    # Show all active tasks
-    active_table = "\n".join(active_rows) if active_rows else "| - | No active tasks | - | - | - |"
-    
-    # Generate completed tasks table - only include minimal info and limit to recent completions
-    completed_rows = []
-    completed_tasks = [(task_id, task) for task_id, task in tasks.items() if task['status'] == '✅']
-    # Sort by completion date (most recent first)
-    completed_tasks.sort(key=lambda x: x[1]['completed'] if x[1]['completed'] else "", reverse=True)
-    
-    # Show all completed tasks
-    for task_id, task in completed_tasks:
-        title = task['title'].replace('\n', ' ').strip()  # Remove line breaks
-        if len(title) > 40:  # Truncate long titles but maintain table alignment
-            title = f"{title[:37]}…"  # Use single character ellipsis
-        completed_rows.append(f"| {task_id} | {title} | {task['completed']} | [tasks/{task_id}.md] |")
-    
-    completed_table = "\n".join(completed_rows) if completed_rows else "| - | No completed tasks | - | - |"
-    
-    # Generate dependencies section - keep it brief
-    dependencies = []
-    # Only include active task dependencies
-    active_task_ids = [task_id for task_id, task in tasks.items() if task['status'] != '✅']
-    for task_id in active_task_ids:
-        task = tasks[task_id]
-        if task['dependencies'] and task['dependencies'] != "-":
-            dependencies.append(f"- **{task_id}** → Depends on → **{task['dependencies']}**")
-    
-    # Show all dependencies
-    dependencies_section = "\n".join(dependencies) if dependencies else "- No dependencies recorded"
-    
-    # Generate priority queue - top 5 only
-    priority_queue = []
-    priority_tasks = [t for t in tasks.values() if t['status'] == '🔄']
-    priority_tasks.sort(key=lambda x: {"HIGH": 0, "MEDIUM": 1, "LOW": 2}.get(x['priority'], 3))
-    
-    for i, task in enumerate(priority_tasks[:5], 1):
-        title = task['title']
-        if len(title) > 30:  # Truncate long titles
-            title = title[:27] + "..."
-        priority_queue.append(f"{i}. **{task['id']}**: {title}")
-    
-    priority_section = "\n".join(priority_queue) if priority_queue else "No active tasks in queue"
+def create_master_task_file(tasks, write=write_file, aggregates=None):
+    """
+    Create master tasks file from template and data, written with write(path, content).
+    aggregates may be a TaskAggregates already up to date with tasks.
+    """
+    template = load_template(MASTER_TASK_TEMPLATE_PATH, MASTER_TASK_TEMPLATE_FIELDS)
+    if aggregates is None:
+        aggregates = TaskAggregates()
+        aggregates.update(tasks)
+    views = aggregates.views
+    
+    # Find latest task ID
+    numbers = views['numbers'].ids()
+    latest_task_id = f"T{int(numbers[-1][1:])}" if numbers else "T0"
+    
+    active_rows = views['active'].rows()
+    completed_rows = views['completed'].rows()
+    dependencies = views['dependencies'].rows()
+    
+    # Priority queue - top 5 only
+    priority_queue = [f"{i}. {row}" for i, row in enumerate(views['priority'].rows(5), 1)]
     
     # Generate recent updates - keep it to just a few
     today = TIMESTAMP.split()[0]
     updates = [f"- {today}: Restructured tasks into individual files"]
     
-    # Replace template placeholders
-    content = template
-    content = content.replace("[Timestamp]", TIMESTAMP)
-    content = content.replace("- **Active Tasks:** [Count]", f"- **Active Tasks:** {active_count}")
-    content = content.replace("- **Paused Tasks:** [Count]", f"- **Paused Tasks:** {paused_count}")
-    content = content.replace("- **Completed Tasks:** [Count]", f"- **Completed Tasks:** {completed_count}")
-    content = content.replace("- **Latest Task ID:** [Task ID]", f"- **Latest Task ID:** {latest_task_id}")
-    
-    # First replace the table header
-    content = content.replace("### Active Tasks\n| ID | Title | Status | Priority | Created | Task File |",
-                            "### Active Tasks\n| ID | Title | Status | Priority | Started | Task File |")
-    
-    # Then replace the example rows with our data
-    content = content.replace("| T1 | [Brief Title] | 🔄 | HIGH | [Date] | [tasks/T1.md] |\n| T2 | [Brief Title] | 🔄 | MEDIUM | [Date] | [tasks/T2.md] |\n| T3 | [Brief Title] | ⏸️ | LOW | [Date] | [tasks/T3.md] |", 
-                            active_table)
-    content = content.replace("| T0 | [Brief Title] | [Date] | [tasks/T0.md] |", completed_table)
-    
-    # Replace dependencies section
-    content = content.replace("- **T1** → Blocks → **T3**\n- **T2** → Depends on → **T0**", dependencies_section)
-    
-    # Replace priority queue
-    content = content.replace("1. **T1**: [Brief reason for priority]\n2. **T2**: [Brief reason for priority]\n3. **T3**: [Brief reason for priority]", priority_section)
-    
-    # Replace updates section
-    content = content.replace("- [Date]: Created task **T3** - [Brief description]\n- [Date]: Completed task **T0** - [Brief description]\n- [Date]: Updated priority for task **T1** - [Brief reason]", "\n".join(updates))
-    
+    content = template.render({
+        'timestamp': TIMESTAMP,
+        'active_count': f"- **Active Tasks:** {aggregates.counts['active']}",
+        'paused_count': f"- **Paused Tasks:** {aggregates.counts['paused']}",
+        'completed_count': f"- **Completed Tasks:** {aggregates.counts['completed']}",
+        'latest_task_id': f"- **Latest Task ID:** {latest_task_id}",
+        'active_header': "### Active Tasks\n| ID | Title | Status | Priority | Started | Task File |",
+        'active_table': "\n".join(active_rows) if active_rows else "| - | No active tasks | - | - | - |",
+        'completed_table': "\n".join(completed_rows) if completed_rows else "| - | No completed tasks | - | - |",
+        'dependencies': "\n".join(dependencies) if dependencies else "- No dependencies recorded",
+        'priority_queue': "\n".join(priority_queue) if priority_queue else "No active tasks in queue",
+        'updates': "\n".join(updates),
+    })
+
     # Create new master task file
     master_path = MEMORY_BANK_DIR / "tasks_new.md"
-    write_file(master_path, content)
+    write(master_path, content)
     return master_path
 
-def main():
-    """Main function to orchestrate the restructuring process."""
+MANIFEST_VERSION = 1
+
+def content_hash(value):
+    """Return the SHA-256 hex digest of a string or a JSON-serializable value."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+def load_manifest(path):
+    """
+    Load the manifest of content hashes written by the previous run.
+    A missing, unreadable or outdated manifest gives an empty one, forcing a full run.
+    """
+    manifest = {'version': MANIFEST_VERSION, 'sessions': {}, 'tasks': {}, 'masters': {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return manifest
+    if data.get('version') == MANIFEST_VERSION:
+        manifest.update(data)
+    return manifest
+
+def save_manifest(manifest, path):
+    """Save the manifest for the next incremental run."""
+    write_file(path, json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False) + "\n")
+
+def render_changed(records, create_file, template, directory, previous, incremental):
+    """
+    Render one file per record, skipping records whose content hash is unchanged.
+
+    Each record is hashed together with its template, so editing the template
+    re-renders every record. Records are only skipped when incremental is set, the
+    hash matches the previous manifest entry and that output file still exists.
+    Returns (files, entries, rendered): file names and manifest entries by ID and the
+    number of records rendered.
+    """
+    files = {}
+    entries = {}
+    rendered = 0
+    for record_id, record in records.items():
+        digest = content_hash([template.digest, record])
+        entry = previous.get(record_id)
+        if not (incremental and entry and entry['hash'] == digest and (directory / entry['file']).exists()):
+            entry = {'hash': digest, 'file': create_file(record)}
+            rendered += 1
+        files[record_id] = entry['file']
+        entries[record_id] = entry
+    return files, entries, rendered
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    number INTEGER,
+    title TEXT,
+    status TEXT,
+    priority TEXT,
+    started TEXT,
+    completed TEXT,
+    dependencies TEXT,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_started ON tasks (started);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    status TEXT,
+    priority TEXT,
+    started TEXT,
+    last_updated TEXT,
+    context TEXT,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_status ON sessions (status);
+CREATE INDEX IF NOT EXISTS sessions_last_updated ON sessions (last_updated);
+
+-- Files named in the Files field of a task or session
+CREATE TABLE IF NOT EXISTS file_refs (
+    kind TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (kind, record_id, path)
+);
+CREATE INDEX IF NOT EXISTS file_refs_path ON file_refs (path);
+
+-- Task IDs referenced by a task or session: 'depends' for a task's dependencies
+-- column, 'mentions' for any other occurrence in its text
+CREATE TABLE IF NOT EXISTS task_refs (
+    kind TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    ref_id TEXT NOT NULL,
+    PRIMARY KEY (kind, record_id, relation, ref_id)
+);
+CREATE INDEX IF NOT EXISTS task_refs_ref ON task_refs (ref_id, relation);
+"""
+
+def open_index(path):
+    """Open (creating if needed) the SQLite index of the memory bank."""
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(INDEX_SCHEMA)
+    return conn
+
+def _record_refs(kind, record):
+    """Return the (relation, task ID) cross-references of a task or session record."""
+    refs = set()
+    if kind == 'task' and record['dependencies'] and record['dependencies'] != "-":
+        refs.update(('depends', ref_id) for ref_id in extract_task_ids(record['dependencies']))
+    text = "\n".join(value for key, value in record.items() if isinstance(value, str) and key != 'dependencies')
+    refs.update(('mentions', ref_id) for ref_id in extract_task_ids(text))
+    # A record referring to itself (e.g. through its own task file link) is not a reference
+    return {(relation, ref_id) for relation, ref_id in refs if ref_id != record['id']}
+
+def _index_records(conn, kind, records):
+    """Bring the rows of one record kind in line with records; return the number changed."""
+    table = 'tasks' if kind == 'task' else 'sessions'
+    stored = dict(conn.execute(f"SELECT id, hash FROM {table}"))
+    changed = 0
+    
+    for record_id, record in records.items():
+        digest = content_hash(record)
+        if stored.pop(record_id, None) == digest:
+            continue
+        changed += 1
+        
+        if kind == 'task':
+            conn.execute(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (record_id, int(record_id[1:]), record['title'], record['status'], record['priority'],
+                 record['started'], record['completed'], record['dependencies'], digest))
+        else:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (record_id, record['title'], record['status'], record['priority'],
+                 record['started'], record['last_updated'], record['context'], digest))
+        
+        conn.execute("DELETE FROM file_refs WHERE kind = ? AND record_id = ?", (kind, record_id))
+        conn.executemany("INSERT OR IGNORE INTO file_refs VALUES (?, ?, ?)",
+                         [(kind, record_id, path) for path in _file_paths(record['files'])])
+        conn.execute("DELETE FROM task_refs WHERE kind = ? AND record_id = ?", (kind, record_id))
+        conn.executemany("INSERT INTO task_refs VALUES (?, ?, ?, ?)",
+                         [(kind, record_id, relation, ref_id) for relation, ref_id in _record_refs(kind, record)])
+    
+    # Anything left in stored no longer exists in the source files
+    for record_id in stored:
+        changed += 1
+        conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
+        conn.execute("DELETE FROM file_refs WHERE kind = ? AND record_id = ?", (kind, record_id))
+        conn.execute("DELETE FROM task_refs WHERE kind = ? AND record_id = ?", (kind, record_id))
+    
+    return changed
+
+def update_index(conn, sessions, tasks):
+    """
+    Update the index from parsed sessions and tasks in one transaction.
+    Only records whose content hash changed are rewritten; returns the number changed.
+    """
+    with conn:
+        return _index_records(conn, 'session', sessions) + _index_records(conn, 'task', tasks)
+
+def get_task(conn, task_id):
+    """Return the indexed row of a task as a dictionary, or None."""
+    row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return dict(row) if row else None
+
+def tasks_by_status(conn, status):
+    """Return the IDs of tasks with the given status, in task order."""
+    return [row[0] for row in conn.execute(
+        "SELECT id FROM tasks WHERE status = ? ORDER BY number", (status,))]
+
+def sessions_updated_since(conn, date):
+    """Return the IDs of sessions last updated on or after date (YYYY-MM-DD), newest first."""
+    return [row[0] for row in conn.execute(
+        "SELECT id FROM sessions WHERE last_updated >= ? ORDER BY last_updated DESC", (date,))]
+
+def records_mentioning(conn, task_id, kind=None):
+    """Return (kind, record ID) pairs of tasks and sessions that reference task_id."""
+    query = "SELECT DISTINCT kind, record_id FROM task_refs WHERE ref_id = ?"
+    params = [task_id]
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+    return [tuple(row) for row in conn.execute(query + " ORDER BY kind, record_id", params)]
+
+def sessions_mentioning(conn, task_id):
+    """Return the IDs of sessions that reference task_id."""
+    return [record_id for _, record_id in records_mentioning(conn, task_id, 'session')]
+
+def records_referencing_file(conn, path):
+    """Return (kind, record ID) pairs of tasks and sessions that list the file path."""
+    return [tuple(row) for row in conn.execute(
+        "SELECT kind, record_id FROM file_refs WHERE path = ? ORDER BY kind, record_id", (path,))]
+
+def task_dependencies(conn, task_id, transitive=False):
+    """
+    Return the IDs of the tasks task_id depends on, i.e. the tasks that block it.
+    With transitive, follow the dependency graph all the way down; cycles are safe.
+    """
+    if not transitive:
+        return sorted(row[0] for row in conn.execute(
+            "SELECT ref_id FROM task_refs WHERE kind = 'task' AND relation = 'depends' AND record_id = ?",
+            (task_id,)))
+    return sorted(row[0] for row in conn.execute("""
+        WITH RECURSIVE deps(id) AS (
+            SELECT ref_id FROM task_refs WHERE kind = 'task' AND relation = 'depends' AND record_id = ?
+            UNION
+            SELECT r.ref_id FROM task_refs r JOIN deps ON r.record_id = deps.id
+            WHERE r.kind = 'task' AND r.relation = 'depends'
+        )
+        SELECT id FROM deps WHERE id != ?""", (task_id, task_id)))
+
+def task_dependents(conn, task_id, transitive=False):
+    """
+    Return the IDs of the tasks that depend on task_id, i.e. the tasks it blocks.
+    With transitive, follow the dependency graph all the way up; cycles are safe.
+    """
+    if not transitive:
+        return sorted(row[0] for row in conn.execute(
+            "SELECT record_id FROM task_refs WHERE kind = 'task' AND relation = 'depends' AND ref_id = ?",
+            (task_id,)))
+    return sorted(row[0] for row in conn.execute("""
+        WITH RECURSIVE dependents(id) AS (
+            SELECT record_id FROM task_refs WHERE kind = 'task' AND relation = 'depends' AND ref_id = ?
+            UNION
+            SELECT r.record_id FROM task_refs r JOIN dependents ON r.ref_id = dependents.id
+            WHERE r.kind = 'task' AND r.relation = 'depends'
+        )
+        SELECT id FROM dependents WHERE id != ?""", (task_id, task_id)))
+
+# Section boundaries used by watch mode. Session sections never extend past a '### ',
+# and task detail sections and tables never extend past a line starting with '###'
+# (tables only end earlier), so each piece can be parsed on its own.
+SESSION_SECTION_SPLIT_RE = re.compile(r'(?=### )')
+TASK_SECTION_SPLIT_RE = re.compile(r'(?m)^(?=###)')
+
+def _parse_session_section(section):
+    """Parse one piece of session_cache.md into its session records."""
+    return list(iter_session_records(io.StringIO(section)))
+
+def _parse_task_section(section):
+    """
+    Parse one piece of tasks.md into (records, active table state, completed table state),
+    where the states are those of the table scanners at the end of the piece.
+    """
+    if not section.strip():
+        return [], 'heading', 'heading'
+    active_table = _TableScanner('## Active Tasks')
+    completed_table = _TableScanner('## Completed Tasks')
+    records = list(iter_task_records(io.StringIO(section), active_table, completed_table))
+    return records, active_table.state, completed_table.state
+
+class SectionCache:
+    """
+    Parse results of a file cached by the exact text of each section, so that after an
+    edit only the sections whose text changed are parsed again.
+    """
+
+    def __init__(self, split_pattern, parse_section):
+        self.split_pattern = split_pattern
+        self.parse_section = parse_section
+        self.sections = {}
+
+    def parse(self, content):
+        """Return (parsed sections in file order, number of sections parsed afresh)."""
+        results = []
+        sections = {}
+        parsed = 0
+        for section in self.split_pattern.split(content):
+            if section in sections:
+                result = sections[section]
+            elif section in self.sections:
+                result = self.sections[section]
+            else:
+                result = self.parse_section(section)
+                parsed += 1
+            sections[section] = result
+            results.append(result)
+        # Only keep sections that are still in the file
+        self.sections = sections
+        return results, parsed
+
+def _combine_session_sections(sections):
+    sessions = {}
+    for records in sections:
+        for session in records:
+            sessions[session['id']] = session
+    return sessions
+
+def _combine_task_sections(sections):
+    """
+    Merge parsed tasks.md pieces into tasks, or return None if a table heading's first
+    cell runs on past the end of its piece and the file has to be parsed as a whole.
+    """
+    # Only rows of the first Active Tasks and Completed Tasks tables in the file count
+    records = []
+    found = {'active': False, 'completed': False}
+    for section_records, active_state, completed_state in sections:
+        for record in section_records:
+            if not found.get(record['kind']):
+                records.append(record)
+        for kind, state in (('active', active_state), ('completed', completed_state)):
+            if not found[kind] and state == 'first_cell':
+                return None
+            found[kind] = found[kind] or state in ('rows', 'done')
+    return merge_task_records(records)
+
+class WatchedFile:
+    """A source file polled for changes through its modification time and size."""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+
+    def changed(self):
+        """Return True if the file changed (or appeared or vanished) since the last call."""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self.signature:
+            return False
+        self.signature = signature
+        return True
+
+def watch(interval=0.5, max_cycles=None):
+    """
+    Keep the memory bank parsed in memory and regenerate the outputs whenever
+    session_cache.md, tasks.md or one of the templates changes.
+
+    Files are polled every interval seconds by modification time and size. Only
+    sections whose text changed are parsed again, the master file aggregates are
+    updated for the changed records only, and only those records are re-rendered.
+    A changed template re-renders every file made from it.
+    Runs until interrupted, or for max_cycles polls if given.
+    """
+    global TIMESTAMP
+    
+    session_source = WatchedFile(SESSION_CACHE_PATH)
+    task_source = WatchedFile(TASKS_PATH)
+    template_sources = {
+        'session': WatchedFile(SESSION_TEMPLATE_PATH),
+        'task': WatchedFile(TASK_TEMPLATE_PATH),
+        'master_session': WatchedFile(MASTER_SESSION_TEMPLATE_PATH),
+        'master_task': WatchedFile(MASTER_TASK_TEMPLATE_PATH),
+    }
+    # The first cycle renders everything anyway, so start from the current templates
+    for source in template_sources.values():
+        source.changed()
+    session_sections = SectionCache(SESSION_SECTION_SPLIT_RE, _parse_session_section)
+    task_sections = SectionCache(TASK_SECTION_SPLIT_RE, _parse_task_section)
+    session_aggregates = SessionAggregates()
+    task_aggregates = TaskAggregates()
+    sessions = {}
+    tasks = {}
+    
+    print(f"Watching {SESSION_CACHE_PATH} and {TASKS_PATH} (Ctrl+C to stop)")
+    ensure_output_dirs()
+    index = open_index(INDEX_PATH)
+    cycle = 0
+    try:
+        while max_cycles is None or cycle < max_cycles:
+            cycle += 1
+            sessions_changed = session_source.changed()
+            tasks_changed = task_source.changed()
+            templates_changed = {name for name, source in template_sources.items() if source.changed()}
+            if not (sessions_changed or tasks_changed or templates_changed):
+                time.sleep(interval)
+                continue
+            if templates_changed:
+                load_template.cache_clear()
+            
+            started = time.perf_counter()
+            TIMESTAMP = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            parsed = 0
+            
+            if sessions_changed:
+                sections, count = session_sections.parse(read_file(SESSION_CACHE_PATH))
+                parsed_sessions = _combine_session_sections(sections)
+                parsed += count
+                if parsed_sessions or not sessions:
+                    sessions = parsed_sessions
+                else:
+                    # Most likely caught mid-write; the finished write changes it again
+                    print(f"Ignoring empty read of {SESSION_CACHE_PATH}")
+                    sessions_changed = False
+            if tasks_changed:
+                content = read_file(TASKS_PATH)
+                parsed_tasks = {}
+                if content.strip():
+                    sections, count = task_sections.parse(content)
+                    parsed_tasks = _combine_task_sections(sections)
+                    parsed += count
+                    if parsed_tasks is None:
+                        parsed_tasks = parse_tasks(content)
+                if parsed_tasks or not tasks:
+                    tasks = parsed_tasks
+                else:
+                    print(f"Ignoring empty read of {TASKS_PATH}")
+                    tasks_changed = False
+            if not (sessions_changed or tasks_changed or templates_changed):
+                continue
+            
+            changed_sessions = session_aggregates.update(sessions)
+            changed_tasks = task_aggregates.update(tasks)
+            sessions_moved = session_aggregates.layout_changed
+            tasks_moved = task_aggregates.layout_changed
+            
+            # A changed template affects every record rendered from it
+            render_sessions = sessions if 'session' in templates_changed else changed_sessions
+            render_tasks = tasks if 'task' in templates_changed else changed_tasks
+            
+            with BulkWriter(progress_interval=float('inf')) as writer:
+                for task_id in render_sessions:
+                    create_session_file(sessions[task_id], writer.write)
+                for task_id in render_tasks:
+                    create_task_file(tasks[task_id], writer.write)
+                if changed_sessions or sessions_moved or 'master_session' in templates_changed:
+                    create_master_session_file(sessions, writer.write, session_aggregates)
+                if changed_tasks or tasks_moved or 'master_task' in templates_changed:
+                    create_master_task_file(tasks, writer.write, task_aggregates)
+            update_index(index, sessions, tasks)
+            
+            elapsed = (time.perf_counter() - started) * 1000
+            reloaded = f", reloaded {', '.join(sorted(templates_changed))} templates" if templates_changed else ""
+            print(f"[{TIMESTAMP}] Parsed {parsed} sections, updated {len(changed_sessions)} sessions "
+                  f"and {len(changed_tasks)} tasks{reloaded} in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        index.close()
+
+# Per-item file names: tasks/T12.md and sessions/T12_20250424.md (with optional
+# letter suffixes such as T73a). Other files in those directories are not items.
+# The monolithic parsers only read plain T<number> IDs, so merging skips suffixed ones.
+TASK_FILE_RE = re.compile(r'^T(\d+)([a-z]*)\.md$')
+SESSION_FILE_RE = re.compile(r'^T(\d+)([a-z]*)_(\d{8})\.md$')
+ITEM_FIELD_RE = re.compile(r'^(?:- )?\*\*([^*]+?)(?::\*\*|\*\*:)\s*(.*?)\s*$')
+ITEM_HEADING_RE = re.compile(r'^#{1,6}\s+(.*?)\s*$')
+PLACEHOLDER_RE = re.compile(r'^\[[^\]]*\]$')
+ITEM_LIST_ITEM_RE = re.compile(r'^\s*(?:[-*+]|\d+\.)\s')
+PLACEHOLDER_TOKEN_RE = re.compile(r'`?\[[^\]]*\]`?')
+# List marker, task checkbox and status icon in front of a list item's text
+ITEM_LIST_PREFIX_RE = re.compile(r'^(?:(?:[-*+]|\d+\.)\s+)?(?:\[[ xX]\]\s+)?(?:(?:✅|🔄|⬜|⏸\ufe0f?)\s*)?')
+
+# Headings of the per-item files mapped to the field labels the monolithic parsers read
+ITEM_SECTION_LABELS = {
+    'Acceptance Criteria': 'Criteria',
+    'Related Files': 'Files',
+    'Task Progress': 'Progress',
+}
+
+def iter_item_files(directories, pattern, key):
+    """
+    Yield (sort key, path) for the per-item files in directories, in key order.
+
+    Each directory listing is heapified and popped lazily, and the listings are
+    combined with heapq.merge, so files come out in order without sorting every name
+    up front or holding any file content. key maps a file name match to its sort key.
+    """
+    def listing(directory):
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            return
+        with entries:
+            heap = [(key(match), entry.path) for entry in entries
+                    for match in [pattern.match(entry.name)] if match and entry.is_file()]
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)
+
+    return heapq.merge(*(listing(directory) for directory in directories))
+
+def _item_value(value):
+    """Return a field value, or "" for unfilled template placeholders."""
+    value = value.strip()
+    return "" if PLACEHOLDER_RE.match(value) or value == "N/A" else value
+
+def _is_placeholder(text):
+    """
+    Check whether a heading, list item or paragraph line holds nothing but unfilled
+    template placeholders, such as '- [ ] [Criterion 1]' or '- `[file path]`: [...]'.
+    A bold field counts when its value is a placeholder.
+    """
+    if '[' not in text:
+        return False
+    text = ITEM_LIST_PREFIX_RE.sub('', text.strip(), count=1)
+    field = ITEM_FIELD_RE.match(text)
+    if field:
+        text = field.group(2)
+    residue, count = PLACEHOLDER_TOKEN_RE.subn('', text)
+    return count > 0 and not residue.strip(' :-–')
+
+def read_item_fields(path, names):
+    """
+    Read the first value of each bold field ('**Name:** value' or '**Name**: value')
+    in names from a per-item file, reading only as far as needed to find them all.
+    A name may be a tuple of alternative spellings, stored under the first one.
+    Returns {lowercase name: value} with "" for fields that were not found.
+    """
+    aliases = {}
+    for name in names:
+        spellings = (name,) if isinstance(name, str) else name
+        for spelling in spellings:
+            aliases[spelling.lower()] = spellings[0].lower()
+    fields = {name: "" for name in aliases.values()}
+    missing = set(fields)
+    for line in read_lines(path):
+        if not line.startswith(('**', '- **')):
+            continue
+        match = ITEM_FIELD_RE.match(line)
+        if not match:
+            continue
+        name = aliases.get(match.group(1).strip().lower())
+        if name in missing:
+            value = _item_value(match.group(2))
+            if value:
+                fields[name] = value
+                missing.discard(name)
+                if not missing:
+                    break
+    return fields
+
+def iter_item_body(path, inline_sections=()):
+    """
+    Yield the lines of a per-item file rewritten to fit inside one section of a
+    monolithic file: the title line is dropped and headings become '**Label**: '
+    fields. Sections whose label is in inline_sections, given either as a heading or
+    as an empty bold field followed by a list, are collapsed into one comma-separated
+    line of the backquoted paths in their list items, the form _file_paths() splits.
+    Headings and lines holding only unfilled template placeholders are dropped, as
+    read_item_fields() ignores them too.
+    """
+    inline_label = None
+    inline_items = []
+    first = True
+    for line in read_lines(path):
+        if first:
+            first = False
+            if line.startswith('# '):
+                continue
+        
+        # An inlined list runs until the first line that is not a list item
+        if inline_label is not None:
+            if ITEM_LIST_ITEM_RE.match(line):
+                inline_items.extend(item for item in re.findall(r"`([^`]+)`", line)
+                                    if not PLACEHOLDER_RE.match(item))
+                continue
+            yield f"**{inline_label}**: {', '.join(inline_items)}\n"
+            inline_label = None
+            inline_items = []
+        
+        heading = ITEM_HEADING_RE.match(line) if line.startswith('#') else None
+        if heading:
+            name = heading.group(1)
+            if not name or name == 'Task Information' or _is_placeholder(name):
+                continue
+            label = ITEM_SECTION_LABELS.get(name, name)
+            if label in inline_sections:
+                inline_label = label
+            else:
+                yield f"**{label}**: \n"
+            continue
+        
+        field = ITEM_FIELD_RE.match(line) if line.startswith('**') else None
+        if field and not field.group(2):
+            label = ITEM_SECTION_LABELS.get(field.group(1).strip(), field.group(1).strip())
+            if label in inline_sections:
+                inline_label = label
+                continue
+        
+        if not _is_placeholder(line):
+            yield line if line.endswith('\n') else line + '\n'
+    
+    if inline_label is not None:
+        yield f"**{inline_label}**: {', '.join(inline_items)}\n"
+
+def _table_cell(value):
+    # Keep cell values on one line and free of column separators
+    return value.replace('\n', ' ').replace('|', '/')
+
+def _task_file_key(match):
+    return (int(match.group(1)), match.group(2))
+
+def _has_plain_id(path, pattern, warn):
+    """Check that a per-item file name carries a T<number> ID without a letter suffix."""
+    if not pattern.match(os.path.basename(path)).group(2):
+        return True
+    if warn:
+        print(f"Skipping {path}: suffixed task IDs are not read by the monolithic parsers")
+    return False
+
+def merge_task_files(directories, output_path):
+    """
+    Rebuild a monolithic tasks.md from per-item task files, streaming in task ID order.
+
+    The tables are built from the header fields of each file, read lazily; completed
+    rows are spooled to a temporary file until the active table is finished. The
+    details sections then stream each file through. Only one file is open at a time
+    and the output is replaced atomically at the end. Returns the number of tasks.
+    """
+    count = 0
+    with atomic_open(output_path) as output, \
+            tempfile.SpooledTemporaryFile(max_size=1 << 20, mode='w+', encoding='utf-8') as completed:
+        output.write(f"# Tasks Master Reference\n*Last Updated: {TIMESTAMP}*\n\n")
+        output.write("## Active Tasks\n| ID | Title | Status | Priority | Started | Dependencies |\n"
+                     "|----|-------|--------|----------|---------|--------------|\n")
+        
+        for _, path in iter_item_files(directories, TASK_FILE_RE, _task_file_key):
+            if not _has_plain_id(path, TASK_FILE_RE, warn=True):
+                continue
+            task_id = os.path.basename(path)[:-3]
+            fields = read_item_fields(path, ('Title', 'Status', 'Priority', 'Started', ('Depends On', 'Dependencies')))
+            title = _table_cell(fields['title'])
+            if '✅' in fields['status'] or 'COMPLETE' in fields['status']:
+                completion = read_item_fields(path, ('Completed',))['completed']
+                completed.write(f"| {task_id} | {title} | {_table_cell(completion)} |\n")
+            else:
+                output.write(f"| {task_id} | {title} | {_table_cell(fields['status'])} | "
+                             f"{_table_cell(fields['priority'])} | {_table_cell(fields['started'])} | "
+                             f"{_table_cell(fields['depends on']) or '-'} |\n")
+            count += 1
+        
+        output.write("\n## Completed Tasks\n| ID | Title | Completed |\n|----|-------|-----------|\n")
+        completed.seek(0)
+        shutil.copyfileobj(completed, output)
+        
+        output.write("\n## Task Details\n")
+        for _, path in iter_item_files(directories, TASK_FILE_RE, _task_file_key):
+            if not _has_plain_id(path, TASK_FILE_RE, warn=False):
+                continue
+            task_id = os.path.basename(path)[:-3]
+            title = read_item_fields(path, ('Title',))['title']
+            output.write(f"### {task_id}: {title}\n")
+            output.writelines(iter_item_body(path, inline_sections=('Files',)))
+            output.write("\n")
+    return count
+
+def merge_session_files(directories, output_path, order='id'):
+    """
+    Rebuild a monolithic session_cache.md from per-item session files, streaming them
+    in task ID order (order='id') or date order (order='date'); either way the latest
+    session of a task comes last, which is the one the session parser keeps.
+    Returns the number of session files merged.
+    """
+    if order == 'id':
+        key = lambda match: (int(match.group(1)), match.group(2), match.group(3))
+    elif order == 'date':
+        key = lambda match: (match.group(3), int(match.group(1)), match.group(2))
+    else:
+        raise ValueError(f"Unknown order '{order}', expected 'id' or 'date'")
+    
+    count = 0
+    with atomic_open(output_path) as output:
+        output.write(f"# Session Cache\n*Last Updated: {TIMESTAMP}*\n\n## Sessions\n")
+        for _, path in iter_item_files(directories, SESSION_FILE_RE, key):
+            if not _has_plain_id(path, SESSION_FILE_RE, warn=True):
+                continue
+            match = SESSION_FILE_RE.match(os.path.basename(path))
+            task_id = f"T{match.group(1)}"
+            date = match.group(3)
+            fields = read_item_fields(path, ('Title', 'Status', 'Priority', 'Started', 'Current Focus'))
+            output.write(f"### {task_id}: {fields['title']}\n"
+                         f"**Status:** {fields['status'] or '🔄'} **Priority:** {fields['priority'] or 'MEDIUM'}\n"
+                         f"**Started:** {fields['started']}\n"
+                         f"**Last**: {date[:4]}-{date[4:6]}-{date[6:]}\n"
+                         f"**Context**: {fields['current focus']}\n")
+            output.writelines(iter_item_body(path, inline_sections=('Files',)))
+            output.write("\n")
+            count += 1
+    return count
+
+def merge(order='id'):
+    """Rebuild the monolithic files from the per-item files, next to the originals."""
+    tasks_path = MEMORY_BANK_DIR / "tasks_merged.md"
+    sessions_path = MEMORY_BANK_DIR / "session_cache_merged.md"
+    print(f"Merged {merge_task_files([TASKS_DIR], tasks_path)} task files into {tasks_path}")
+    print(f"Merged {merge_session_files([SESSIONS_DIR], sessions_path, order)} session files into {sessions_path}")
+
+def main(incremental=False, dry_run=False):
+    """
+    Main function to orchestrate the restructuring process.
+    With incremental set, only records whose content or template changed since the
+    last run (as recorded in the manifest) are rendered again. With dry_run set, the
+    files are parsed and rendered but nothing is written: no output files, index or
+    manifest. Returns the run's RunReport.
+    """
+    report = RunReport()
     print("Memory Bank Restructuring Script")
     print("--------------------------------")
     print(f"Timestamp: {TIMESTAMP}")
     print(f"Project Root: {PROJECT_ROOT}")
+    if dry_run:
+        print("Dry run: no files will be written")
     print()
     
-    # Read existing files
-    print("Reading existing files...")
-    session_cache_content = read_file(SESSION_CACHE_PATH)
-    tasks_content = read_file(TASKS_PATH)
-    
-    # Parse content
-    print("Parsing session cache...")
-    sessions = parse_session_cache(session_cache_content)
-    print(f"Found {len(sessions)} sessions")
-    
-    print("Parsing tasks...")
-    tasks = parse_tasks(tasks_content)
-    print(f"Found {len(tasks)} tasks")
-    
-    # Create individual session files
-    print("\nCreating individual session files...")
-    session_files = {}
-    for task_id, session in sessions.items():
-        filename = create_session_file(session)
-        session_files[task_id] = filename
-    
-    # Create individual task files
-    print("\nCreating individual task files...")
-    task_files = {}
-    for task_id, task in tasks.items():
-        filename = create_task_file(task)
-        task_files[task_id] = filename
-    
-    # Create master files
-    print("\nCreating master session cache file...")
-    master_session = create_master_session_file(sessions)
-    
-    print("Creating master tasks file...")
-    master_tasks = create_master_task_file(tasks)
+    # Stream the existing files through the parsers line by line
+    with report.phase('parse'):
+        print("Parsing session cache...")
+        sessions = {}
+        for session in iter_session_records(read_lines(SESSION_CACHE_PATH)):
+            sessions[session['id']] = session
+        print(f"Found {len(sessions)} sessions")
+        
+        print("Parsing tasks...")
+        tasks = merge_task_records(iter_task_records(read_lines(TASKS_PATH)))
+        print(f"Found {len(tasks)} tasks")
+    
+    if not dry_run:
+        ensure_output_dirs()
+        
+        # Keep the cross-reference index in step with the parsed records
+        with report.phase('index'):
+            index = open_index(INDEX_PATH)
+            try:
+                print(f"Indexed {update_index(index, sessions, tasks)} changed records in {INDEX_PATH}")
+            finally:
+                index.close()
+    
+    manifest = load_manifest(MANIFEST_PATH)
+    
+    # Queue all output through the writer; close() finishes and syncs every file
+    # Queue all output through the writer; it finishes and syncs every file on exit
+    writer = DryRunWriter() if dry_run else BulkWriter()
+    with writer:
+        with report.phase('render'):
+            # Create individual session files
+            print("\nCreating individual session files...")
+            session_template = load_template(SESSION_TEMPLATE_PATH, SESSION_TEMPLATE_FIELDS)
+            session_files, session_entries, sessions_rendered = render_changed(
+                sessions, lambda session: create_session_file(session, writer.write),
+                session_template, SESSIONS_DIR, manifest['sessions'], incremental)
+            print(f"Rendered {sessions_rendered} of {len(sessions)} session files")
+            
+            # Create individual task files
+            print("\nCreating individual task files...")
+            task_template = load_template(TASK_TEMPLATE_PATH, TASK_TEMPLATE_FIELDS)
+            task_files, task_entries, tasks_rendered = render_changed(
+                tasks, lambda task: create_task_file(task, writer.write),
+                task_template, TASKS_DIR, manifest['tasks'], incremental)
+            print(f"Rendered {tasks_rendered} of {len(tasks)} task files")
+            
+            # Create master files, which only change when some record or their template does
+            master_hashes = {
+                'session_cache': content_hash([
+                    load_template(MASTER_SESSION_TEMPLATE_PATH, MASTER_SESSION_TEMPLATE_FIELDS).digest,
+                    [[task_id, entry['hash']] for task_id, entry in session_entries.items()]]),
+                'tasks': content_hash([
+                    load_template(MASTER_TASK_TEMPLATE_PATH, MASTER_TASK_TEMPLATE_FIELDS).digest,
+                    [[task_id, entry['hash']] for task_id, entry in task_entries.items()]]),
+            }
+            master_session = MEMORY_BANK_DIR / "session_cache_new.md"
+            master_tasks = MEMORY_BANK_DIR / "tasks_new.md"
+            
+            def master_changed(name, path):
+                return not (incremental and manifest['masters'].get(name) == master_hashes[name] and path.exists())
+            
+            if master_changed('session_cache', master_session):
+                print("\nCreating master session cache file...")
+                master_session = create_master_session_file(sessions, writer.write)
+            else:
+                print("\nMaster session cache file is up to date")
+            
+            if master_changed('tasks', master_tasks):
+                print("Creating master tasks file...")
+                master_tasks = create_master_task_file(tasks, writer.write)
+            else:
+                print("Master tasks file is up to date")
+        
+        with report.phase('drain'):
+            writer.close()
+    
+    # Rendering overlaps with the writer threads: keep the time spent blocked on a full
+    # queue out of render, and report write as the workers' summed file I/O time
+    report.phases['render'] -= writer.wait_seconds
+    report.phases['queue_wait'] = writer.wait_seconds
+    report.phases['write'] = writer.write_seconds
+    
+    report.counters.update({
+        'dry_run': dry_run,
+        'incremental': incremental,
+        'records': {
+            'sessions': len(sessions),
+            'tasks': len(tasks),
+            'sessions_rendered': sessions_rendered,
+            'tasks_rendered': tasks_rendered,
+        },
+        'files': {
+            'rendered': writer.queued,
+            'written': writer.written,
+            'unchanged': writer.unchanged,
+        },
+        'bytes': {
+            'read': _file_size(SESSION_CACHE_PATH) + _file_size(TASKS_PATH),
+            'rendered': writer.bytes_rendered,
+            'written': writer.bytes_written,
+        },
+    })
+    
+    if dry_run:
+        print(f"\nDry run complete: {writer.queued} files ({writer.bytes_rendered} bytes) would be written")
+        return report
+    
+    # Record what was rendered only once every output file is safely on disk
+    save_manifest({
+        'version': MANIFEST_VERSION,
+        'sessions': session_entries,
+        'tasks': task_entries,
+        'masters': master_hashes,
+    }, MANIFEST_PATH)
     
     print("\nRestructuring complete!")
     print(f"- New master session cache: {master_session}")
@@ -645,6 +2029,56 @@ def main():
     print(f"   mv {master_session} {SESSION_CACHE_PATH}")
     print(f"   mv {master_tasks} {TASKS_PATH}")
     print("3. Update any references to these files in your workflow")
+    return report
     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Break the monolithic memory bank files into individual files")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-render records that changed since the last run")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and regenerate outputs whenever the source files change")
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help="Polling interval in seconds for --watch (default: 0.5)")
+    parser.add_argument('--merge', action='store_true',
+                        help="Rebuild monolithic tasks_merged.md and session_cache_merged.md from the per-item files")
+    parser.add_argument('--order', choices=['id', 'date'], default='id',
+                        help="Order of the sessions in the merged session cache (default: id)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Parse and render everything but write no files, index or manifest")
+    parser.add_argument('--report', metavar='PATH',
+                        help="Write a JSON report of phase timings, bytes and record counts to PATH ('-' for stdout)")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Suppress progress output")
+    paths = parser.add_argument_group('paths', "Locations of the memory bank files (default: under --root)")
+    paths.add_argument('--root', help="Project root (default: the directory containing this script)")
+    paths.add_argument('--memory-bank', help="Memory bank directory (default: ROOT/memory-bank)")
+    paths.add_argument('--session-cache', help="Monolithic session cache (default: MEMORY_BANK/session_cache.md)")
+    paths.add_argument('--tasks', help="Monolithic tasks file (default: MEMORY_BANK/tasks.md)")
+    paths.add_argument('--sessions-dir', help="Per-session output directory (default: MEMORY_BANK/sessions)")
+    paths.add_argument('--tasks-dir', help="Per-task output directory (default: MEMORY_BANK/tasks)")
+    paths.add_argument('--templates-dir', help="Template directory (default: MEMORY_BANK/templates)")
+    args = parser.parse_args()
+    
+    configure(root=args.root, memory_bank=args.memory_bank, session_cache=args.session_cache,
+              tasks=args.tasks, sessions_dir=args.sessions_dir, tasks_dir=args.tasks_dir,
+              templates_dir=args.templates_dir)
+    
+    if args.report and (args.merge or args.watch):
+        parser.error("--report is only supported for restructuring runs")
+    if args.dry_run and (args.merge or args.watch):
+        parser.error("--dry-run is only supported for restructuring runs")
+    
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull if args.quiet else sys.stdout):
+        if args.merge:
+            merge(args.order)
+        elif args.watch:
+            watch(args.interval)
+        else:
+            report = main(incremental=args.incremental, dry_run=args.dry_run)
+    
+    if args.report:
+        payload = json.dumps(report.as_dict(), indent=2)
+        if args.report == '-':
+            print(payload)
+        else:
+            Path(args.report).write_text(payload + "\n", encoding='utf-8')
@@ -0,0 +1,21 @@
+"""
+Shared loader for intertwiner-spaces.py, whose hyphenated file name cannot be
+imported directly.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+def load_intertwiner_spaces():
+    """
+    Load intertwiner-spaces.py as the module intertwiner_spaces, once per process.
+    """
+    if "intertwiner_spaces" in sys.modules:
+        return sys.modules["intertwiner_spaces"]
+    path = Path(__file__).with_name("intertwiner-spaces.py")
+    spec = importlib.util.spec_from_file_location("intertwiner_spaces", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["intertwiner_spaces"] = module
+    spec.loader.exec_module(module)
+    return module
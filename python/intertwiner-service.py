@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Local query service for intertwiner data.
+
+Serves dimension, basis and recoupling queries from intertwiner-spaces.py over HTTP
+on localhost, so the web app and notebooks can share one warm process instead of
+each recomputing the same results.
+
+Endpoints (GET with query parameters or POST with a JSON body):
+    /dimension   spins=0.5,0.5,1,1 [total_spin=0]   exact multiplicity of total_spin
+    /basis       spins=j1,j2,j3,j4 [format=binary]  orthonormal intertwiner basis
+    /recoupling  spins=j1,j2,j3,j4                  dimensions for the three pairings
+    /batch       POST {"queries": [{"type": "dimension", "spins": [...]}, ...]}
+    /stats                                          cache statistics
+
+Requests are limited to spins up to MAX_SPIN and MAX_VALENCE legs (MAX_BASIS_SPIN for
+/basis, whose vectors grow as (2j+1)^4), so no single query can tie up a worker for long.
+
+Usage:
+    python intertwiner-service.py [--host 127.0.0.1] [--port 8765] [--cg-table table.npy]
+"""
+
+import argparse
+import json
+import math
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from _intertwiner_loader import load_intertwiner_spaces
+
+intertwiner_spaces = load_intertwiner_spaces()
+
+class QueryCache:
+    """
+    Thread-safe result cache that coalesces concurrent identical queries.
+
+    The first thread to ask for a key computes it; threads asking for the same key
+    while it is in flight wait on the same future instead of computing it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, compute):
+        """Return the cached result for key, computing it with compute() if needed."""
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return self._results[key]
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = Future()
+                self._pending[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = compute()
+        except Exception as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._results[key] = result
+            del self._pending[key]
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        """Return cache counters as a dictionary."""
+        with self._lock:
+            return {
+                'entries': len(self._results),
+                'in_flight': len(self._pending),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+            }
+
+CACHE = QueryCache()
+
+# Request limits; the slowest admissible /dimension query takes a few seconds
+MAX_SPIN = 50
+MAX_VALENCE = 500
+MAX_BASIS_SPIN = 8
+
+def _parse_spins(value, max_spin=MAX_SPIN, max_valence=MAX_VALENCE):
+    """
+    Accept spins as a list or a comma-separated string and return a tuple of floats.
+    Every spin must be a non-negative integer or half-integer of at most max_spin,
+    and there may be at most max_valence of them.
+    """
+    if isinstance(value, str):
+        value = [v for v in value.split(',') if v.strip()]
+    if len(value) > max_valence:
+        raise ValueError(f"Too many spins: {len(value)}, at most {max_valence} are allowed")
+    spins = tuple(float(j) for j in value)
+    for j in spins:
+        if not math.isfinite(j) or j < 0 or 2 * j != int(2 * j):
+            raise ValueError(f"Invalid spin {j}: spins must be non-negative integers or half-integers")
+        if j > max_spin:
+            raise ValueError(f"Spin {j} is too large, at most {max_spin} is allowed")
+    return spins
+
+def _four_spins(params, max_spin=MAX_SPIN):
+    """Extract exactly four spins from request parameters."""
+    spins = _parse_spins(params.get('spins', ()), max_spin)
+    if len(spins) != 4:
+        raise ValueError(f"Expected 4 spins, got {len(spins)}")
+    return spins
+
+def query_dimension(params):
+    """Exact multiplicity of total_spin (default 0) for any number of spins."""
+    spins = _parse_spins(params.get('spins', ()))
+    total_spin, = _parse_spins([params.get('total_spin', 0)], max_spin=MAX_SPIN * MAX_VALENCE)
+    key = ('dimension', tuple(sorted(spins)), total_spin)
+    dimension = CACHE.get(key, lambda: intertwiner_spaces.intertwiner_dimension_exact(spins, total_spin))
+    return {'spins': list(spins), 'total_spin': total_spin, 'dimension': dimension}
+
+def query_basis(params):
+    """Orthonormal intertwiner basis of a 4-valent node, as intermediate spins and vectors."""
+    spins = _four_spins(params, MAX_BASIS_SPIN)
+
+    def compute():
+        basis = intertwiner_spaces.orthonormalize_basis(intertwiner_spaces.get_intertwiner_basis(*spins))
+        vectors = np.array([vector.real for _, vector in basis])
+        return [j for j, _ in basis], vectors
+
+    intermediate_js, vectors = CACHE.get(('basis', spins), compute)
+    return {'spins': list(spins), 'intermediate_js': intermediate_js, 'vectors': vectors}
+
+def query_recoupling(params):
+    """Intertwiner dimensions for the three recoupling schemes of a 4-valent node."""
+    spins = _four_spins(params)
+    dimensions = CACHE.get(('recoupling', spins),
+                           lambda: intertwiner_spaces.all_recoupling_dimensions(*spins))
+    return {'spins': list(spins), 'dimensions': dimensions}
+
+QUERIES = {
+    'dimension': query_dimension,
+    'basis': query_basis,
+    'recoupling': query_recoupling,
+}
+
+def _to_json(value):
+    """Convert query results into JSON-serializable values."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
+
+class IntertwinerRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler dispatching to the query functions."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'IntertwinerService/1.0'
+
+    def log_message(self, format, *args):
+        # Keep the console quiet; errors are returned to the client as JSON
+        pass
+
+    def _params(self):
+        """Merge query string parameters with a JSON request body."""
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = json.loads(self.rfile.read(length) or b'{}')
+            params.update(body)
+        return url.path.rstrip('/') or '/', params
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(_to_json(payload)).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_array(self, result):
+        """Send basis vectors as raw little-endian float64 with the metadata in headers."""
+        vectors = result['vectors'].astype('<f8', copy=False)
+        body = vectors.tobytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Array-Dtype', '<f8')
+        self.send_header('X-Array-Shape', json.dumps(list(vectors.shape)))
+        self.send_header('X-Intermediate-Js', json.dumps(result['intermediate_js']))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+
+    def _stream_batch(self, queries):
+        """Stream a JSON array of batch results with chunked transfer encoding."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        self._write_chunk(b'[')
+        for i, query in enumerate(queries):
+            try:
+                result = QUERIES[query.get('type')](query)
+            except Exception as e:
+                result = {'error': f"{type(e).__name__}: {e}"}
+            prefix = b',' if i else b''
+            self._write_chunk(prefix + json.dumps(_to_json(result)).encode('utf-8'))
+        self._write_chunk(b']')
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _handle(self):
+        try:
+            path, params = self._params()
+            name = path.lstrip('/')
+
+            if name == 'stats':
+                self._send_json(CACHE.stats())
+            elif name == 'batch':
+                queries = params.get('queries')
+                if not isinstance(queries, list):
+                    raise ValueError("Batch requests need a 'queries' list")
+                self._stream_batch(queries)
+            elif name in QUERIES:
+                result = QUERIES[name](params)
+                if name == 'basis' and params.get('format') == 'binary':
+                    self._send_array(result)
+                else:
+                    self._send_json(result)
+            else:
+                self._send_json({'error': f"Unknown endpoint {path}"}, status=404)
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError) as e:
+            self._send_json({'error': f"{type(e).__name__}: {e}"}, status=400)
+        except Exception as e:
+            self._send_json({'error': f"{type(e).__name__}: {e}"}, status=500)
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+def serve(host='127.0.0.1', port=8765, cg_table=None):
+    """Start the service and block until interrupted."""
+    if cg_table:
+        intertwiner_spaces.use_cg_table(intertwiner_spaces.load_cg_table(cg_table))
+
+    server = ThreadingHTTPServer((host, port), IntertwinerRequestHandler)
+    server.daemon_threads = True
+    print(f"Serving intertwiner queries on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local query service for intertwiner data")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to bind (default: localhost only)")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    parser.add_argument('--cg-table', help="Packed Clebsch-Gordan table from build_cg_table() to load")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.cg_table)
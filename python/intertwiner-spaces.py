@@ -1,4 +1,7 @@
 import numpy as np
+from functools import lru_cache
+from fractions import Fraction
+from math import comb
 from sympy.physics.quantum.cg import CG
 from sympy import S
 from itertools import product
@@ -65,7 +68,26 @@ def intertwiner_dimension(j1, j2, j3, j4):
 def cg_coefficient(j1, m1, j2, m2, j, m):
     """
     Calculate Clebsch-Gordan coefficient <j1 m1 j2 m2|j m>.
+    
+    Uses the table set with use_cg_table() when it covers j1 and j2, otherwise the
+    Racah sum on doubled labels: the floating point kernel up to doubled spins of
+    _KERNEL_MAX_TWO_J, the exact rational evaluation above that. sympy is only a
+    fallback for labels that are not integers or half-integers.
     """
+    if _CG_TABLE is not None and _CG_TABLE.covers(j1, j2):
+        return _CG_TABLE.cg(j1, m1, j2, m2, j, m)
+    
+    doubled = [2 * float(x) for x in (j1, m1, j2, m2, j, m)]
+    if all(abs(x - round(x)) < 1e-9 for x in doubled):
+        a, am, b, bm, c, cm = (int(round(x)) for x in doubled)
+        if min(a, b, c) >= 0:
+            two_j_max = max(a, b, c)
+            if two_j_max <= _KERNEL_MAX_TWO_J:
+                return float(_cg_scalar_loop(a, am, b, bm, c, cm, _log_factorials(3 * two_j_max + 2)))
+            if c < abs(a - b) or c > a + b or (a + b + c) % 2 or (a + am) % 2 or (b + bm) % 2:
+                return 0.0
+            return _racah_cg_doubled(a, am, b, bm, c, cm, _factorial_table(3 * two_j_max + 2))
+    
     try:
         # Use sympy's CG function - we need to convert to Rational for exact calculations
         coef = float(CG(S(j1), S(m1), S(j2), S(m2), S(j), S(m)).doit())
@@ -74,50 +96,407 @@ def cg_coefficient(j1, m1, j2, m2, j, m):
         print(f"Error calculating CG coefficient: {e}")
         return 0.0
 
-def construct_basis_vector(j1, j2, j3, j4, intermediate_j):
+# Precomputed Clebsch-Gordan table
+#
+# Spins are stored doubled (a = 2*j1, b = 2*j2, c = 2*j) so every label is an integer.
+# Only the canonical representative with j1 >= j2 and m >= 0 is kept; the exchange
+# symmetry <j2 m2 j1 m1|j m> = (-1)^(j1+j2-j) <j1 m1 j2 m2|j m> and the reflection
+# <j1 -m1 j2 -m2|j -m> = (-1)^(j1+j2-j) <j1 m1 j2 m2|j m> recover the rest.
+# Each admissible (a, b, c) owns a block of (a+1) * (c//2+1) values indexed by
+# (j1-m1, m), so a lookup is a block offset plus integer arithmetic and one array read.
+
+# Table used by cg_coefficient when set through use_cg_table
+_CG_TABLE = None
+
+def _factorials(n):
+    """Return the exact factorials 0!, 1!, ..., n! as Python integers."""
+    result = [1] * (n + 1)
+    for i in range(1, n + 1):
+        result[i] = result[i - 1] * i
+    return result
+
+# Exact factorial table shared by cg_coefficient, grown on demand
+_FACTORIALS = [1]
+
+def _factorial_table(n):
+    """Return a list of exact factorials covering 0..n, extending the cached list when needed."""
+    global _FACTORIALS
+    if len(_FACTORIALS) <= n:
+        _FACTORIALS = _factorials(max(n, 2 * len(_FACTORIALS)))
+    return _FACTORIALS
+
+def _racah_cg_doubled(a, am, b, bm, c, cm, fact):
     """
-    Construct a basis vector for the intertwiner space corresponding to 
-    the intermediate coupling through value j.
+    Evaluate <j1 m1 j2 m2|j m> with the Racah formula in exact rational arithmetic.
+    Arguments are doubled spins and projections; fact is a factorial list from _factorials.
     """
-    # Convert to float for numerical calculation
-    j1, j2, j3, j4, intermediate_j = float(j1), float(j2), float(j3), float(j4), float(intermediate_j)
+    if am + bm != cm or abs(am) > a or abs(bm) > b or abs(cm) > c:
+        return 0.0
     
-    # Calculate dimensions
-    dim1, dim2, dim3, dim4 = int(2*j1+1), int(2*j2+1), int(2*j3+1), int(2*j4+1)
-    total_dim = dim1 * dim2 * dim3 * dim4
+    # Half-differences of doubled labels are the integer arguments of the factorials
+    j12 = (a + b - c) // 2
+    j1_minus_m1, j1_plus_m1 = (a - am) // 2, (a + am) // 2
+    j2_minus_m2, j2_plus_m2 = (b - bm) // 2, (b + bm) // 2
+    k_min = max(0, (b - c - am) // 2, (a - c + bm) // 2)
+    k_max = min(j12, j1_minus_m1, j2_plus_m2)
     
-    # Initialize basis vector
-    basis_vector = np.zeros(total_dim, dtype=complex)
+    total = 0
+    for k in range(k_min, k_max + 1):
+        term = Fraction(1, fact[k] * fact[j12 - k] * fact[j1_minus_m1 - k] * fact[j2_plus_m2 - k]
+                        * fact[(c - b + am) // 2 + k] * fact[(c - a - bm) // 2 + k])
+        total += -term if k % 2 else term
     
-    # Generate all possible m values
-    m1_values = [j1 - i for i in range(dim1)]
-    m2_values = [j2 - i for i in range(dim2)]
-    m3_values = [j3 - i for i in range(dim3)]
-    m4_values = [j4 - i for i in range(dim4)]
+    if total == 0:
+        return 0.0
     
-    # Couple j1 and j2 to intermediate_j, then couple with j3 and j4 to total j=0
-    for m1, m2, m3, m4 in product(m1_values, m2_values, m3_values, m4_values):
-        # Skip if m values don't sum to 0 (required for j=0)
-        if abs(m1 + m2 + m3 + m4) > 1e-10:
-            continue
+    squared = (Fraction((c + 1) * fact[(c + a - b) // 2] * fact[(c - a + b) // 2] * fact[j12],
+                        fact[(a + b + c) // 2 + 1])
+               * fact[(c + cm) // 2] * fact[(c - cm) // 2]
+               * fact[j1_minus_m1] * fact[j1_plus_m1] * fact[j2_minus_m2] * fact[j2_plus_m2]
+               * total * total)
+    return (1.0 if total > 0 else -1.0) * float(squared) ** 0.5
+
+def _cg_table_offsets(two_j_max):
+    """
+    Compute the block offsets of the packed table for doubled spins up to two_j_max.
+    Returns (offsets, size) where offsets[a, b, c] is -1 for blocks that are not stored.
+    Position 0 of the flat array is reserved for the 2*j_max header entry.
+    """
+    n = two_j_max
+    offsets = np.full((n + 1, n + 1, 2 * n + 1), -1, dtype=np.int64)
+    position = 1
+    for a in range(n + 1):
+        for b in range(a + 1):
+            for c in range(a - b, a + b + 1, 2):
+                offsets[a, b, c] = position
+                position += (a + 1) * (c // 2 + 1)
+    return offsets, position
+
+class CGTable:
+    """
+    Packed table of Clebsch-Gordan coefficients up to j_max with O(1) indexed lookup.
+    
+    The values live in a flat float64 array whose first entry records 2*j_max.
+    Tables saved with save() are loaded with load_cg_table(), which memory-maps the
+    file so every process on a node shares the same pages.
+    """
+    
+    def __init__(self, values):
+        self.values = values
+        self.two_j_max = int(values[0])
+        self.j_max = self.two_j_max / 2
+        self.offsets, _ = _cg_table_offsets(self.two_j_max)
+    
+    def save(self, path):
+        """Write the table to path in .npy format."""
+        np.save(path, np.asarray(self.values))
+    
+    def covers(self, *spins):
+        """Check whether all given spins are within the range of the table."""
+        return all(2 * float(j) <= self.two_j_max + 1e-10 for j in spins)
+    
+    def cg(self, j1, m1, j2, m2, j, m):
+        """Look up the Clebsch-Gordan coefficient <j1 m1 j2 m2|j m>."""
+        a, am = int(round(2 * j1)), int(round(2 * m1))
+        b, bm = int(round(2 * j2)), int(round(2 * m2))
+        c, cm = int(round(2 * j)), int(round(2 * m))
         
-        # Sum over allowed intermediate m values
-        intermediate_dim = int(2*intermediate_j + 1)
-        for i in range(intermediate_dim):
-            intermediate_m = intermediate_j - i
-            
-            # Calculate Clebsch-Gordan coefficients
-            cg1 = cg_coefficient(j1, m1, j2, m2, intermediate_j, intermediate_m)
-            cg2 = cg_coefficient(intermediate_j, intermediate_m, j3, m3, j4, -m4)  # Note: For j=0, m must be 0
-            
-            # Calculate index in the tensor product basis
-            idx = (int(j1-m1) * dim2 * dim3 * dim4 + 
-                   int(j2-m2) * dim3 * dim4 + 
-                   int(j3-m3) * dim4 + 
-                   int(j4-m4))
-            
-            if 0 <= idx < total_dim:  # Ensure index is within bounds
-                basis_vector[idx] += cg1 * cg2
+        if (am + bm != cm or c < abs(a - b) or c > a + b or (a + b + c) % 2
+                or abs(am) > a or abs(bm) > b or abs(cm) > c or (a - am) % 2 or (b - bm) % 2):
+            return 0.0
+        
+        sign = 1.0
+        if a < b:
+            a, am, b, bm = b, bm, a, am
+            sign = -sign if ((a + b - c) // 2) % 2 else sign
+        if cm < 0:
+            am, bm, cm = -am, -bm, -cm
+            sign = -sign if ((a + b - c) // 2) % 2 else sign
+        if a > self.two_j_max:
+            raise ValueError(f"Spin {a / 2} exceeds the table range j_max={self.j_max}")
+        
+        index = self.offsets[a, b, c] + ((a - am) // 2) * (c // 2 + 1) + (cm - c % 2) // 2
+        return sign * float(self.values[index])
+    
+    def wigner_3j(self, j1, j2, j3, m1, m2, m3):
+        """Look up the Wigner 3j symbol (j1 j2 j3; m1 m2 m3)."""
+        phase = -1.0 if int(round(j1 - j2 - m3)) % 2 else 1.0
+        return phase / np.sqrt(2 * j3 + 1) * self.cg(j1, m1, j2, m2, j3, -m3)
+
+def build_cg_table(j_max, path=None):
+    """
+    Precompute all Clebsch-Gordan coefficients with j1, j2 <= j_max into a packed table.
+    The coefficients are evaluated exactly before rounding to float64. If path is given
+    the table is also written there for later use with load_cg_table().
+    """
+    two_j_max = int(round(2 * j_max))
+    offsets, size = _cg_table_offsets(two_j_max)
+    fact = _factorials(3 * two_j_max + 2)
+    
+    values = np.zeros(size)
+    values[0] = two_j_max
+    
+    for a in range(two_j_max + 1):
+        for b in range(a + 1):
+            for c in range(a - b, a + b + 1, 2):
+                base = offsets[a, b, c]
+                width = c // 2 + 1
+                for i in range(a + 1):
+                    am = a - 2 * i
+                    for k in range(width):
+                        cm = c % 2 + 2 * k
+                        values[base + i * width + k] = _racah_cg_doubled(a, am, b, cm - am, c, cm, fact)
+    
+    table = CGTable(values)
+    if path is not None:
+        table.save(path)
+    return table
+
+def load_cg_table(path):
+    """
+    Load a table written by build_cg_table() as a read-only memory map, so the
+    values are paged in on demand and shared between processes.
+    """
+    return CGTable(np.load(path, mmap_mode='r'))
+
+def use_cg_table(table):
+    """
+    Make cg_coefficient answer from a precomputed table whenever the spins are in range.
+    Pass None to go back to on-demand evaluation.
+    """
+    global _CG_TABLE
+    _CG_TABLE = table
+
+# Numerical kernels for Clebsch-Gordan evaluation and basis assembly
+#
+# Both kernels work on doubled spins and use the Racah formula in floating point, with
+# every term formed as exp(log prefactor - log denominators) so intermediate values
+# stay bounded. When numba is available the loop kernels are JIT-compiled at import
+# time; otherwise vectorized NumPy implementations are used. check_kernel_parity()
+# compares both against the exact rational evaluation; test_intertwiner_kernels.py
+# asserts it.
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+KERNEL_BACKEND = 'numba' if njit is not None else 'numpy'
+
+# Largest doubled spin for which cg_coefficient trusts the floating point Racah sum;
+# the alternating terms cancel more as spins grow, and beyond this the absolute error
+# exceeds 1e-12
+_KERNEL_MAX_TWO_J = 40
+
+# Log-factorial table shared by the kernels, grown on demand
+_LOG_FACTORIALS = np.zeros(1)
+
+def _log_factorials(n):
+    """Return a table of log(k!) for k = 0..n, extending the cached table when needed."""
+    global _LOG_FACTORIALS
+    if len(_LOG_FACTORIALS) <= n:
+        size = max(n + 1, 2 * len(_LOG_FACTORIALS))
+        _LOG_FACTORIALS = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, size)))])
+    return _LOG_FACTORIALS
+
+def _cg_scalar_loop(a, am, b, bm, c, cm, log_fact):
+    """Racah sum for a single coefficient with doubled labels (compiled by numba)."""
+    if am + bm != cm or abs(am) > a or abs(bm) > b or abs(cm) > c:
+        return 0.0
+    if c < abs(a - b) or c > a + b or (a + b + c) % 2 != 0 or (a + am) % 2 != 0 or (b + bm) % 2 != 0:
+        return 0.0
+    
+    j12 = (a + b - c) // 2
+    j1_minus_m1 = (a - am) // 2
+    j2_plus_m2 = (b + bm) // 2
+    k_min = max(0, (b - c - am) // 2, (a - c + bm) // 2)
+    k_max = min(j12, j1_minus_m1, j2_plus_m2)
+    
+    log_prefactor = 0.5 * (np.log(c + 1.0) + log_fact[(c + a - b) // 2] + log_fact[(c - a + b) // 2]
+                           + log_fact[j12] - log_fact[(a + b + c) // 2 + 1]
+                           + log_fact[(c + cm) // 2] + log_fact[(c - cm) // 2]
+                           + log_fact[j1_minus_m1] + log_fact[(a + am) // 2]
+                           + log_fact[(b - bm) // 2] + log_fact[j2_plus_m2])
+    
+    total = 0.0
+    for k in range(k_min, k_max + 1):
+        term = np.exp(log_prefactor - log_fact[k] - log_fact[j12 - k] - log_fact[j1_minus_m1 - k]
+                      - log_fact[j2_plus_m2 - k] - log_fact[(c - b + am) // 2 + k]
+                      - log_fact[(c - a - bm) // 2 + k])
+        total += -term if k % 2 else term
+    return total
+
+def _cg_batch_loop(a, am, b, bm, c, cm, log_fact):
+    """Evaluate _cg_scalar_loop over arrays of doubled labels."""
+    result = np.zeros(a.shape[0])
+    for i in range(a.shape[0]):
+        result[i] = _cg_scalar_loop(a[i], am[i], b[i], bm[i], c[i], cm[i], log_fact)
+    return result
+
+def _cg_batch_numpy(a, am, b, bm, c, cm, log_fact):
+    """Vectorized Racah sum over arrays of doubled labels."""
+    valid = ((am + bm == cm) & (np.abs(am) <= a) & (np.abs(bm) <= b) & (np.abs(cm) <= c)
+             & (c >= np.abs(a - b)) & (c <= a + b) & ((a + b + c) % 2 == 0)
+             & ((a + am) % 2 == 0) & ((b + bm) % 2 == 0))
+    result = np.zeros(a.shape[0])
+    if not valid.any():
+        return result
+    a, am, b, bm, c, cm = (x[valid] for x in (a, am, b, bm, c, cm))
+    
+    j12 = (a + b - c) // 2
+    j1_minus_m1 = (a - am) // 2
+    j2_plus_m2 = (b + bm) // 2
+    k_min = np.maximum(0, np.maximum((b - c - am) // 2, (a - c + bm) // 2))
+    k_max = np.minimum(j12, np.minimum(j1_minus_m1, j2_plus_m2))
+    
+    log_prefactor = 0.5 * (np.log(c + 1.0) + log_fact[(c + a - b) // 2] + log_fact[(c - a + b) // 2]
+                           + log_fact[j12] - log_fact[(a + b + c) // 2 + 1]
+                           + log_fact[(c + cm) // 2] + log_fact[(c - cm) // 2]
+                           + log_fact[j1_minus_m1] + log_fact[(a + am) // 2]
+                           + log_fact[(b - bm) // 2] + log_fact[j2_plus_m2])
+    
+    # Step all entries through their own k range at once, masking finished ones
+    total = np.zeros(a.shape[0])
+    for offset in range(int((k_max - k_min).max()) + 1):
+        k = k_min + offset
+        active = k <= k_max
+        k = np.where(active, k, k_min)
+        term = np.exp(log_prefactor - log_fact[k] - log_fact[j12 - k] - log_fact[j1_minus_m1 - k]
+                      - log_fact[j2_plus_m2 - k] - log_fact[(c - b + am) // 2 + k]
+                      - log_fact[(c - a - bm) // 2 + k])
+        total += np.where(active, np.where(k % 2 == 1, -term, term), 0.0)
+    
+    result[valid] = total
+    return result
+
+def _assemble_basis_loop(a1, a2, a3, a4, two_j, log_fact):
+    """
+    Accumulate the (12)(34) coupled intertwiner through two_j into a flat tensor product
+    vector, looping over (m1, m2, m3) with m4 fixed by m1 + m2 + m3 + m4 = 0.
+    """
+    d2, d3, d4 = a2 + 1, a3 + 1, a4 + 1
+    vector = np.zeros((a1 + 1) * d2 * d3 * d4)
+    for i1 in range(a1 + 1):
+        for i2 in range(d2):
+            for i3 in range(d3):
+                m1, m2, m3 = a1 - 2 * i1, a2 - 2 * i2, a3 - 2 * i3
+                m4 = -(m1 + m2 + m3)
+                if abs(m4) > a4 or (a4 - m4) % 2 != 0:
+                    continue
+                i4 = (a4 - m4) // 2
+                cg1 = _cg_scalar_loop(a1, m1, a2, m2, two_j, m1 + m2, log_fact)
+                cg2 = _cg_scalar_loop(two_j, m1 + m2, a3, m3, a4, -m4, log_fact)
+                phase = -1.0 if i4 % 2 else 1.0
+                vector[((i1 * d2 + i2) * d3 + i3) * d4 + i4] += phase * cg1 * cg2
+    return vector
+
+def _assemble_basis_numpy(a1, a2, a3, a4, two_j, log_fact):
+    """Vectorized counterpart of _assemble_basis_loop over all (m1, m2, m3) at once."""
+    i1, i2, i3 = (x.ravel() for x in np.meshgrid(np.arange(a1 + 1), np.arange(a2 + 1),
+                                                 np.arange(a3 + 1), indexing='ij'))
+    m1, m2, m3 = a1 - 2 * i1, a2 - 2 * i2, a3 - 2 * i3
+    m4 = -(m1 + m2 + m3)
+    keep = np.abs(m4) <= a4
+    i1, i2, i3, m1, m2, m3, m4 = (x[keep] for x in (i1, i2, i3, m1, m2, m3, m4))
+    i4 = (a4 - m4) // 2
+    
+    full = lambda value: np.full(m1.shape[0], value)
+    cg1 = _cg_batch_numpy(full(a1), m1, full(a2), m2, full(two_j), m1 + m2, log_fact)
+    cg2 = _cg_batch_numpy(full(two_j), m1 + m2, full(a3), m3, full(a4), -m4, log_fact)
+    phase = np.where(i4 % 2 == 1, -1.0, 1.0)
+    
+    vector = np.zeros((a1 + 1) * (a2 + 1) * (a3 + 1) * (a4 + 1))
+    idx = np.ravel_multi_index((i1, i2, i3, i4), (a1 + 1, a2 + 1, a3 + 1, a4 + 1))
+    np.add.at(vector, idx, phase * cg1 * cg2)
+    return vector
+
+if njit is not None:
+    _cg_scalar_loop = njit(cache=True)(_cg_scalar_loop)
+    _cg_batch_jit = njit(cache=True)(_cg_batch_loop)
+    _assemble_basis_jit = njit(cache=True)(_assemble_basis_loop)
+    _cg_batch_kernel, _assemble_basis_kernel = _cg_batch_jit, _assemble_basis_jit
+else:
+    _cg_batch_kernel, _assemble_basis_kernel = _cg_batch_numpy, _assemble_basis_numpy
+
+def cg_coefficients(j1, m1, j2, m2, j, m):
+    """
+    Calculate Clebsch-Gordan coefficients <j1 m1 j2 m2|j m> for arrays of labels
+    with the selected kernel backend (see KERNEL_BACKEND).
+    """
+    labels = np.broadcast_arrays(*(np.rint(2 * np.asarray(x, dtype=float)).astype(np.int64)
+                                   for x in (j1, m1, j2, m2, j, m)))
+    shape = labels[0].shape
+    a, am, b, bm, c, cm = (np.ascontiguousarray(x).ravel() for x in labels)
+    if a.size == 0:
+        return np.zeros(shape)
+    log_fact = _log_factorials(int(max(a.max(), b.max(), c.max())) * 2 + 2)
+    return _cg_batch_kernel(a, am, b, bm, c, cm, log_fact).reshape(shape)
+
+def _assemble_basis_exact(a1, a2, a3, a4, two_j, fact):
+    """
+    Reference for the basis assembly kernels built from the exact Racah evaluation,
+    with the same (m1, m2, m3, m4) layout and (-1)^(j4-m4) phase.
+    """
+    d2, d3, d4 = a2 + 1, a3 + 1, a4 + 1
+    vector = np.zeros((a1 + 1) * d2 * d3 * d4)
+    for i1, i2, i3 in product(range(a1 + 1), range(d2), range(d3)):
+        m1, m2, m3 = a1 - 2 * i1, a2 - 2 * i2, a3 - 2 * i3
+        m4 = -(m1 + m2 + m3)
+        if abs(m4) > a4 or (a4 - m4) % 2 != 0:
+            continue
+        i4 = (a4 - m4) // 2
+        cg1 = _racah_cg_doubled(a1, m1, a2, m2, two_j, m1 + m2, fact)
+        cg2 = _racah_cg_doubled(two_j, m1 + m2, a3, m3, a4, -m4, fact)
+        vector[((i1 * d2 + i2) * d3 + i3) * d4 + i4] += (-1) ** i4 * cg1 * cg2
+    return vector
+
+def check_kernel_parity(max_j=4, samples=2000, seed=0):
+    """
+    Compare the NumPy and (when available) numba kernels with the exact Racah evaluation
+    on random labels and on assembled basis vectors. Returns the largest absolute
+    deviation found for each backend.
+    """
+    rng = np.random.default_rng(seed)
+    two_j_max = int(round(2 * max_j))
+    fact = _factorials(3 * two_j_max + 2)
+    log_fact = _log_factorials(3 * two_j_max + 2)
+    
+    # Random admissible labels: pick spins, then projections, then a compatible total spin
+    a = rng.integers(0, two_j_max + 1, samples)
+    b = rng.integers(0, two_j_max + 1, samples)
+    am = a - 2 * rng.integers(0, a + 1)
+    bm = b - 2 * rng.integers(0, b + 1)
+    c = np.abs(a - b) + 2 * rng.integers(0, np.minimum(a, b) + 1)
+    cm = am + bm
+    
+    exact = np.array([_racah_cg_doubled(*(int(x) for x in args), fact)
+                      for args in zip(a, am, b, bm, c, cm)])
+    backends = {'numpy': (_cg_batch_numpy, _assemble_basis_numpy)}
+    if njit is not None:
+        backends['numba'] = (_cg_batch_jit, _assemble_basis_jit)
+    
+    deviations = {}
+    for name, (cg_kernel, assemble_kernel) in backends.items():
+        deviation = np.abs(cg_kernel(a, am, b, bm, c, cm, log_fact) - exact).max()
+        for spins in ((1, 1, 1, 1), (1, 2, 3, 2), (2, 3, 2, 3), (two_j_max,) * 4):
+            for two_j in range(abs(spins[0] - spins[1]), spins[0] + spins[1] + 1, 2):
+                reference = _assemble_basis_exact(*spins, two_j, fact)
+                candidate = assemble_kernel(*spins, two_j, log_fact)
+                deviation = max(deviation, np.abs(candidate - reference).max())
+        deviations[name] = float(deviation)
+    
+    return deviations
+
+def construct_basis_vector(j1, j2, j3, j4, intermediate_j):
+    """
+    Construct a basis vector for the intertwiner space corresponding to 
+    the intermediate coupling through value j.
+    """
+    # Couple j1 and j2 to intermediate_j, then couple with j3 and j4 to total j=0.
+    # The kernels work on doubled spins so that every label is an integer.
+    two_spins = [int(round(2 * float(j))) for j in (j1, j2, j3, j4, intermediate_j)]
+    log_fact = _log_factorials(3 * max(two_spins) + 2)
+    basis_vector = _assemble_basis_kernel(*two_spins, log_fact).astype(complex)
     
     # Normalize
     norm = np.linalg.norm(basis_vector)
@@ -353,6 +732,417 @@ def all_recoupling_dimensions(j1, j2, j3, j4):
     
     return results
 
+def random_unit_normals(n_states, valence=4, seed=None):
+    """
+    Draw n_states configurations of uniformly distributed unit normals, one per leg.
+    Returns an array of shape (n_states, valence, 3).
+    """
+    rng = np.random.default_rng(seed)
+    normals = rng.normal(size=(n_states, valence, 3))
+    return normals / np.linalg.norm(normals, axis=-1, keepdims=True)
+
+def normals_to_angles(normals):
+    """
+    Convert unit normals of shape (..., 3) into polar and azimuthal angles (theta, phi).
+    """
+    normals = np.asarray(normals, dtype=float)
+    norms = np.linalg.norm(normals, axis=-1, keepdims=True)
+    normals = normals / np.where(norms > 1e-10, norms, 1.0)
+    theta = np.arccos(np.clip(normals[..., 2], -1.0, 1.0))
+    phi = np.arctan2(normals[..., 1], normals[..., 0])
+    return theta, phi
+
+def coherent_spin_states(j, normals):
+    """
+    Calculate SU(2) coherent states |j, n> = D^j(phi, theta, 0)|j, j> for a batch of normals.
+    
+    The Wigner-D rotation of the highest weight state is evaluated in closed form,
+    <j m|j n> = e^{-i m phi} sqrt(C(2j, j-m)) cos(theta/2)^(j+m) sin(theta/2)^(j-m),
+    so the whole batch is handled with array operations. Components are ordered
+    m = j, j-1, ..., -j to match the tensor product index of construct_basis_vector.
+    """
+    j = float(j)
+    dim = int(round(2*j + 1))
+    theta, phi = normals_to_angles(normals)
+    
+    k = np.arange(dim)  # k = j - m
+    m_values = j - k
+    prefactors = np.sqrt(np.array([comb(dim - 1, int(i)) for i in k], dtype=float))
+    
+    cos_half = np.cos(theta / 2)[..., None]
+    sin_half = np.sin(theta / 2)[..., None]
+    magnitudes = prefactors * cos_half ** (dim - 1 - k) * sin_half ** k
+    phases = np.exp(-1j * m_values * phi[..., None])
+    return magnitudes * phases
+
+@lru_cache(maxsize=None)
+def _intertwiner_basis_tensor(j1, j2, j3, j4):
+    """
+    Cache the orthonormal intertwiner basis as a read-only array of shape
+    (dimension, 2j1+1, 2j2+1, 2j3+1, 2j4+1) together with its intermediate spins.
+    """
+    basis = orthonormalize_basis(get_intertwiner_basis(j1, j2, j3, j4))
+    dims = tuple(int(round(2*j + 1)) for j in (j1, j2, j3, j4))
+    labels = tuple(j for j, _ in basis)
+    
+    tensor = np.zeros((len(basis),) + dims, dtype=complex)
+    for i, (_, vector) in enumerate(basis):
+        tensor[i] = vector.reshape(dims)
+    tensor.setflags(write=False)
+    
+    return labels, tensor
+
+def coherent_intertwiners(j1, j2, j3, j4, normals, normalize=False, chunk_size=8192):
+    """
+    Calculate Livine-Speziale coherent intertwiners for many normal configurations at once.
+    
+    normals has shape (N, 4, 3), holding one unit normal per leg for each of the N states.
+    The tensor product of the leg coherent states is projected onto the invariant subspace,
+    and each state is returned through its components <iota_J|j_a, n_a> in the orthonormal
+    intertwiner basis. Returns (intermediate_js, coefficients) with coefficients of shape
+    (N, dimension). States are processed in chunks of chunk_size to bound memory use.
+    """
+    spins = (float(j1), float(j2), float(j3), float(j4))
+    labels, tensor = _intertwiner_basis_tensor(*spins)
+    
+    normals = np.asarray(normals, dtype=float)
+    if normals.ndim == 2:
+        normals = normals[None]
+    if normals.shape[1:] != (4, 3):
+        raise ValueError(f"Expected normals of shape (N, 4, 3), got {normals.shape}")
+    
+    n_states = normals.shape[0]
+    dimension = len(labels)
+    coefficients = np.zeros((n_states, dimension), dtype=complex)
+    if dimension == 0:
+        return list(labels), coefficients
+    
+    # Pair the legs as (12)(34) so each chunk reduces to two batched matrix products
+    d1, d2, d3, d4 = tensor.shape[1:]
+    basis_matrix = tensor.conj().reshape(dimension * d1 * d2, d3 * d4)
+    
+    for start in range(0, n_states, chunk_size):
+        block = normals[start:start + chunk_size]
+        size = block.shape[0]
+        v1, v2, v3, v4 = (coherent_spin_states(spins[a], block[:, a]) for a in range(4))
+        
+        w12 = (v1[:, :, None] * v2[:, None, :]).reshape(size, d1 * d2)
+        w34 = (v3[:, :, None] * v4[:, None, :]).reshape(size, d3 * d4)
+        
+        partial = (w34 @ basis_matrix.T).reshape(size, dimension, d1 * d2)
+        coefficients[start:start + size] = np.matmul(partial, w12[:, :, None])[..., 0]
+    
+    if normalize:
+        norms = np.linalg.norm(coefficients, axis=1, keepdims=True)
+        coefficients = coefficients / np.where(norms > 1e-10, norms, 1.0)
+    
+    return list(labels), coefficients
+
+def coherent_overlap_matrix(coefficients_a, coefficients_b=None, normalize=True):
+    """
+    Calculate the overlap matrix <a_i|b_k> between two batches of coherent intertwiners
+    given by their intertwiner basis components. When coefficients_b is omitted the
+    Gram matrix of coefficients_a is returned.
+    """
+    a = np.asarray(coefficients_a, dtype=complex)
+    b = a if coefficients_b is None else np.asarray(coefficients_b, dtype=complex)
+    
+    if normalize:
+        norms_a = np.linalg.norm(a, axis=1, keepdims=True)
+        norms_b = np.linalg.norm(b, axis=1, keepdims=True)
+        a = a / np.where(norms_a > 1e-10, norms_a, 1.0)
+        b = b / np.where(norms_b > 1e-10, norms_b, 1.0)
+    
+    return a.conj() @ b.T
+
+# Exact dimension counting via SU(2) characters
+#
+# The character of spin j is the polynomial x^j + x^(j-1) + ... + x^(-j). Shifting each leg
+# by x^j turns it into 1 + t + ... + t^(2j) with t = x^(-1), and the coefficient of t^(J_tot - M)
+# in the product over all legs counts the product states with total projection M.
+# The multiplicity of total spin J is then c(M=J) - c(M=J+1).
+#
+# Polynomials are multiplied through Kronecker substitution: with a slot width of B bits
+# larger than every coefficient, a polynomial is packed into one big integer by evaluating
+# it at 2^B, so polynomial products become big-integer products. Equal spins are raised to
+# their multiplicity with binary powering and the distinct factors are combined with a
+# balanced product tree. gmpy2 is used for the big-integer arithmetic when installed,
+# since GMP switches to FFT multiplication for large operands.
+
+try:
+    from gmpy2 import mpz as _big_int
+except ImportError:
+    _big_int = int
+
+def _packed_character(two_j, width):
+    """Pack 1 + t + ... + t^(2j) into a big integer with slots of width bits."""
+    one = _big_int(1)
+    return ((one << ((two_j + 1) * width)) - 1) // ((one << width) - 1)
+
+def _product_tree(values):
+    """Multiply a list of big integers by balanced binary splitting."""
+    if not values:
+        return _big_int(1)
+    while len(values) > 1:
+        paired = [values[i] * values[i + 1] for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
+
+def _power_coefficient(two_j, count, k):
+    """
+    Coefficient of t^k in (1 + t + ... + t^(2j))^count, from the alternating binomial sum
+    sum_i (-1)^i C(count, i) C(k - i(2j+1) + count - 1, count - 1) obtained by expanding
+    ((1 - t^(2j+1)) / (1 - t))^count.
+    
+    There are min(count, k / (2j+1)) + 1 terms. When 2j+1 is smaller than count, the inner
+    binomial is stepped from term to term by 2j+1 exact ratios; otherwise it is taken
+    from comb() directly, so the cost does not grow with the spin itself.
+    """
+    if k < 0 or k > two_j * count:
+        return 0
+    dim = two_j + 1
+    if dim == 1:
+        return 1 if k == 0 else 0
+    if dim == 2:
+        # (1 + t)^count
+        return comb(count, k)
+    r = count - 1
+    n_terms = min(count, k // dim) + 1
+    step_inner = dim <= r
+    
+    outer = 1  # C(count, i)
+    inner = comb(k + r, r)  # C(k - i*dim + r, r)
+    total = 0
+    for i in range(n_terms):
+        total += -outer * inner if i % 2 else outer * inner
+        if i + 1 < n_terms:
+            outer = outer * (count - i) // (i + 1)
+            top = k - i * dim + r
+            if step_inner:
+                for s in range(dim):
+                    inner = inner * (top - s - r) // (top - s)
+            else:
+                inner = comb(top - dim, r)
+    return total
+
+def intertwiner_dimension_exact(spins, total_spin=0):
+    """
+    Calculate the exact multiplicity of total spin total_spin in the tensor product of
+    the given spins, as a Python integer. For total_spin=0 this is the dimension of the
+    intertwiner space of a node of any valence.
+    
+    When all legs carry the same spin j a closed-form alternating binomial sum is used
+    (see _power_coefficient), with at most min(n, k / (2j+1)) + 1 terms for n legs and
+    k = (sum(2j) - 2 J_tot) / 2; for spin 1/2 it is a single binomial difference. Its cost
+    does not depend on the size of j beyond the size of the numbers involved.
+    
+    Mixed spins go through the packed product above. The product polynomial has degree
+    sum(2j) with slots of about n log2(2j+1) bits, so it takes O(n^2) bits and time grows
+    faster than quadratically in the number of legs: a few thousand mixed legs take well
+    under a second, tens of thousands take tens of seconds.
+    """
+    two_spins = [int(round(2 * float(j))) for j in spins]
+    two_total = int(round(2 * float(total_spin)))
+    two_j_sum = sum(two_spins)
+    
+    # The total spin must match the parity of the sum and lie within it
+    if two_total < 0 or two_total > two_j_sum or (two_j_sum - two_total) % 2:
+        return 0
+    
+    counts = {}
+    for two_j in two_spins:
+        if two_j > 0:
+            counts[two_j] = counts.get(two_j, 0) + 1
+    
+    # t-exponent of projection M is (2*J_tot - 2*M) / 2
+    k_total = (two_j_sum - two_total) // 2
+    
+    # A single distinct spin has a closed form that avoids the polynomial product
+    if len(counts) == 1:
+        (two_j, count), = counts.items()
+        return _power_coefficient(two_j, count, k_total) - _power_coefficient(two_j, count, k_total - 1)
+    
+    # Every coefficient is bounded by the number of product states
+    bound = 1
+    for two_j, count in counts.items():
+        bound *= (two_j + 1) ** count
+    width = bound.bit_length() + 1
+    
+    factors = [_packed_character(two_j, width) ** count
+               for two_j, count in sorted(counts.items())]
+    product = _product_tree(factors)
+    
+    mask = (_big_int(1) << width) - 1
+    at_total = (product >> (k_total * width)) & mask
+    above_total = (product >> ((k_total - 1) * width)) & mask if k_total > 0 else 0
+    
+    return int(at_total - above_total)
+
+# Monte Carlo sampling over spin labellings and intertwiner states
+#
+# Labellings are handled as doubled spins. A labelling admits a non-zero intertwiner
+# when the doubled spins have an even sum and no spin exceeds the sum of the others
+# (the triangle inequality for four legs, the polygon inequality in general).
+
+def _as_generator(seed):
+    """Return a NumPy Generator from a seed, an existing Generator or None."""
+    return np.random.default_rng(seed)
+
+def admissible_mask(two_spins):
+    """Check parity and polygon constraints row by row for an (N, valence) array of doubled spins."""
+    two_spins = np.asarray(two_spins)
+    total = two_spins.sum(axis=1)
+    return (total % 2 == 0) & (2 * two_spins.max(axis=1) <= total)
+
+def intertwiner_dimensions_batch(two_spins, chunk_elements=2**22):
+    """
+    Calculate intertwiner dimensions for an (N, valence) array of doubled spins at once.
+    
+    The legs are coupled one at a time while tracking, for every row, the multiplicity of
+    each intermediate doubled spin J. Coupling a leg b maps J to all J' with
+    |J - b| <= J' <= J + b and matching parity, which is a difference of prefix sums over
+    J in steps of two, so each leg costs O(N * J_max) array operations. Rows are processed
+    in chunks of about chunk_elements multiplicities to bound memory use.
+    
+    Multiplicities are counted in int64. Rows whose dimension could overflow it go
+    through intertwiner_dimension_exact instead, and the result then has object dtype
+    with Python integers for those rows.
+    """
+    # The dimension does not depend on the order of the legs, so only distinct
+    # sorted rows need to be coupled
+    two_spins = np.sort(np.asarray(two_spins, dtype=np.int64), axis=1)
+    two_spins, inverse = np.unique(two_spins, axis=0, return_inverse=True)
+    n_rows, valence = two_spins.shape
+    
+    # Every multiplicity, and every prefix sum of them, is bounded by the number of
+    # product states prod(2j+1); keep a margin below 2**63 for the float estimate
+    overflows = np.log2(two_spins + 1.0).sum(axis=1) >= 62
+    fast_spins = two_spins[~overflows]
+    size = int(fast_spins.sum(axis=1).max()) + 1 if len(fast_spins) else 1
+    chunk = max(1, chunk_elements // size)
+    j_prime = np.arange(size)[None, :]
+    
+    fast_dimensions = np.zeros(len(fast_spins), dtype=np.int64)
+    for start in range(0, len(fast_spins), chunk):
+        block = fast_spins[start:start + chunk]
+        multiplicities = np.zeros((len(block), size), dtype=np.int64)
+        multiplicities[:, 0] = 1
+        
+        for leg in range(valence):
+            b = block[:, leg][:, None]
+            # Prefix sums over J with stride 2: stride_sums[:, J + 2] = mult[J] + mult[J - 2] + ...
+            stride_sums = np.zeros((len(block), size + 2), dtype=np.int64)
+            stride_sums[:, 2:] = multiplicities
+            stride_sums[:, 2::2] = np.cumsum(stride_sums[:, 2::2], axis=1)
+            stride_sums[:, 3::2] = np.cumsum(stride_sums[:, 3::2], axis=1)
+            
+            low = np.abs(j_prime - b)
+            high = np.minimum(j_prime + b, size - 1)
+            # high must share the parity of low; step it down if the clipping broke that
+            high = high - (high - low) % 2
+            valid = high >= low
+            
+            upper = np.take_along_axis(stride_sums, np.where(valid, high + 2, 0), axis=1)
+            lower = np.take_along_axis(stride_sums, np.where(valid, low, 0), axis=1)
+            multiplicities = np.where(valid, upper - lower, 0)
+        
+        fast_dimensions[start:start + chunk] = multiplicities[:, 0]
+    
+    if not overflows.any():
+        return fast_dimensions[inverse.ravel()]
+    
+    dimensions = np.empty(n_rows, dtype=object)
+    dimensions[~overflows] = [int(d) for d in fast_dimensions]
+    dimensions[overflows] = [intertwiner_dimension_exact(row / 2) for row in two_spins[overflows]]
+    return dimensions[inverse.ravel()]
+
+@lru_cache(maxsize=None)
+def admissible_spin_table(valence=4, max_j=2.0, min_j=0.5):
+    """
+    Enumerate every admissible labelling with spins in [min_j, max_j] in half-integer steps.
+    Returns (two_spins, dimensions), with two_spins of shape (K, valence) as doubled spins.
+    """
+    values = np.arange(int(round(2 * min_j)), int(round(2 * max_j)) + 1, dtype=np.int64)
+    grids = np.meshgrid(*([values] * valence), indexing='ij')
+    two_spins = np.stack([g.ravel() for g in grids], axis=1)
+    two_spins = two_spins[admissible_mask(two_spins)]
+    
+    dimensions = intertwiner_dimensions_batch(two_spins)
+    two_spins.setflags(write=False)
+    dimensions.setflags(write=False)
+    return two_spins, dimensions
+
+def sample_spin_labellings(n_samples, valence=4, max_j=2.0, min_j=0.5, weighted=False,
+                           seed=None, table_limit=2**22):
+    """
+    Draw n_samples admissible labellings with spins in [min_j, max_j], uniformly or
+    weighted by intertwiner dimension. Returns (spins, dimensions) where spins has
+    shape (n_samples, valence).
+    
+    When the number of candidate labellings is at most table_limit, every admissible
+    labelling is enumerated once and draws are a binary search in its cumulative weights.
+    Larger uniform problems fall back to vectorized rejection sampling.
+    """
+    rng = _as_generator(seed)
+    low, high = int(round(2 * min_j)), int(round(2 * max_j))
+    n_candidates = (high - low + 1) ** valence
+    
+    if n_candidates <= table_limit:
+        table, dimensions = admissible_spin_table(valence, float(max_j), float(min_j))
+        if len(table) == 0:
+            raise ValueError("No admissible labellings in the requested spin range")
+        weights = dimensions if weighted else np.ones(len(table))
+        cumulative = np.cumsum(weights, dtype=float)
+        picks = np.searchsorted(cumulative, rng.random(n_samples) * cumulative[-1], side='right')
+        return table[picks] / 2, dimensions[picks]
+    
+    if weighted:
+        raise ValueError(f"Dimension-weighted sampling needs at most {table_limit} candidate "
+                         f"labellings, got {n_candidates}")
+    
+    accepted = []
+    remaining = n_samples
+    while remaining > 0:
+        batch = rng.integers(low, high + 1, size=(2 * remaining + 16, valence))
+        batch = batch[admissible_mask(batch)][:remaining]
+        accepted.append(batch)
+        remaining -= len(batch)
+    two_spins = np.concatenate(accepted)
+    return two_spins / 2, intertwiner_dimensions_batch(two_spins)
+
+def random_intertwiner_states(dimensions, seed=None):
+    """
+    Draw one Haar-random normalized state in the intertwiner basis for each dimension.
+    
+    States of different dimensions are returned packed into one flat complex array:
+    the components of state i are coefficients[offsets[i]:offsets[i + 1]].
+    Zero-dimensional entries get an empty slice.
+    """
+    rng = _as_generator(seed)
+    dimensions = np.asarray(dimensions, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(dimensions)])
+    total = int(offsets[-1])
+    
+    coefficients = rng.normal(size=total) + 1j * rng.normal(size=total)
+    if total:
+        owners = np.repeat(np.arange(len(dimensions)), dimensions)
+        norms = np.sqrt(np.bincount(owners, np.abs(coefficients) ** 2, minlength=len(dimensions)))
+        coefficients /= norms[owners]
+    
+    return coefficients, offsets
+
+def sample_intertwiner_states(n_samples, valence=4, max_j=2.0, min_j=0.5, weighted=False, seed=None):
+    """
+    Draw random labellings together with a random normalized intertwiner state for each.
+    Returns (spins, dimensions, coefficients, offsets); see random_intertwiner_states.
+    """
+    rng = _as_generator(seed)
+    spins, dimensions = sample_spin_labellings(n_samples, valence, max_j, min_j, weighted, rng)
+    coefficients, offsets = random_intertwiner_states(dimensions, rng)
+    return spins, dimensions, coefficients, offsets
+
 # Example of using the permutation-invariant functions
 if __name__ == "__main__":
     print("Using permutation-invariant functions:")
@@ -367,4 +1157,20 @@ if __name__ == "__main__":
     print("All recoupling scheme dimensions for (1, 0.5, 0.5, 1):")
     all_dims = all_recoupling_dimensions(1, 0.5, 0.5, 1)
     for scheme, dim in all_dims.items():
-        print(f"  {scheme}: {dim}")
\ No newline at end of file
+        print(f"  {scheme}: {dim}")
+    
+    print("Coherent intertwiners for four spin-1 legs:")
+    normals = random_unit_normals(1000, seed=0)
+    intermediate_js, coefficients = coherent_intertwiners(1, 1, 1, 1, normals)
+    overlaps = coherent_overlap_matrix(coefficients[:5])
+    print(f"  intermediate j values: {intermediate_js}")
+    print(f"  |overlaps| of first five states:\n{np.round(np.abs(overlaps), 3)}")
+    
+    print("Exact intertwiner dimension for 1000 spin-1/2 legs:")
+    print(f"  {intertwiner_dimension_exact([0.5] * 1000)}")
+    print(f"Kernel backend: {KERNEL_BACKEND}")
+    print(f"  max deviation from exact Racah evaluation: {check_kernel_parity()}")
+    
+    print("Dimension-weighted Monte Carlo over 4-valent labellings with j <= 2:")
+    spins, dimensions, coefficients, offsets = sample_intertwiner_states(100000, weighted=True, seed=0)
+    print(f"  mean dimension: {dimensions.mean():.3f}, first labelling: {spins[0]}")
\ No newline at end of file
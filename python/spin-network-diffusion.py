@@ -0,0 +1,177 @@
+"""
+Diffusion on spin networks.
+
+Implements the heat equation of docs/physics/mathematical-roadmap.md on a fixed graph,
+
+    dphi/dt = -alpha * L * phi,
+
+with the modified Laplacian L_ij = -w(j_ij) for connected nodes and
+L_ii = sum_k w(j_ik) * f(I_i), where w is an edge weight function of the spin
+and f is a factor taken from the intertwiner space at node i.
+
+Graphs are given as flat edge arrays (sources, targets, spins) so that networks
+with millions of nodes can be assembled into a sparse matrix without Python loops.
+"""
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import expm_multiply
+
+from _intertwiner_loader import load_intertwiner_spaces
+
+intertwiner_spaces = load_intertwiner_spaces()
+
+# Edge weight functions w(j), matching lib/models/weightFunctions.ts
+EDGE_WEIGHTS = {
+    'spin': lambda j: j,
+    'casimir': lambda j: j * (j + 1),
+    'dimension': lambda j: 2 * j + 1,
+    'area': lambda j: np.sqrt(j * (j + 1)),
+}
+
+def edge_weights(spins, weight='spin'):
+    """
+    Evaluate the edge weight function w(j) on an array of spins.
+    weight is a key of EDGE_WEIGHTS or a vectorized callable.
+    """
+    spins = np.asarray(spins, dtype=float)
+    if callable(weight):
+        return np.asarray(weight(spins), dtype=float)
+    if weight not in EDGE_WEIGHTS:
+        raise ValueError(f"Unknown edge weight '{weight}', expected one of {sorted(EDGE_WEIGHTS)}")
+    return EDGE_WEIGHTS[weight](spins)
+
+def node_intertwiner_dimensions(n_nodes, sources, targets, spins):
+    """
+    Calculate the intertwiner dimension of every node from the spins of its incident edges.
+
+    Nodes are grouped by the multiset of their incident spins, so the exact dimension is
+    only computed once per distinct configuration however large the graph is.
+    Isolated nodes get dimension 1.
+    """
+    nodes = np.concatenate([sources, targets]).astype(np.int64)
+    two_spins = np.rint(2 * np.concatenate([spins, spins])).astype(np.int64)
+
+    # Sort incidences by node, then by spin, so each node's multiset is a contiguous slice
+    order = np.lexsort((two_spins, nodes))
+    nodes, two_spins = nodes[order], two_spins[order]
+    boundaries = np.searchsorted(nodes, np.arange(n_nodes + 1))
+
+    dimensions = np.empty(n_nodes)
+    cache = {}
+    for i in range(n_nodes):
+        key = two_spins[boundaries[i]:boundaries[i + 1]].tobytes()
+        if key not in cache:
+            legs = np.frombuffer(key, dtype=np.int64) / 2
+            cache[key] = float(intertwiner_spaces.intertwiner_dimension_exact(legs))
+        dimensions[i] = cache[key]
+
+    return dimensions
+
+def build_laplacian(n_nodes, sources, targets, spins, edge_weight='spin', node_weight=None):
+    """
+    Build the spin network Laplacian as a sparse CSR matrix.
+
+    edge_weight selects w(j) (see EDGE_WEIGHTS). node_weight selects f(I_i): None for
+    f = 1 (the ordinary weighted graph Laplacian), 'dimension' for the intertwiner
+    dimension of each node, or an array of length n_nodes. Self-loops are ignored and
+    parallel edges add up.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    spins = np.asarray(spins, dtype=float)
+
+    if node_weight is None:
+        node_factor = np.ones(n_nodes)
+    elif isinstance(node_weight, str) and node_weight == 'dimension':
+        node_factor = node_intertwiner_dimensions(n_nodes, sources, targets, spins)
+    else:
+        node_factor = np.asarray(node_weight, dtype=float)
+        if node_factor.shape != (n_nodes,):
+            raise ValueError(f"node_weight must have shape ({n_nodes},), got {node_factor.shape}")
+
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    weights = edge_weights(spins[keep], edge_weight)
+
+    degree = (np.bincount(sources, weights, minlength=n_nodes)
+              + np.bincount(targets, weights, minlength=n_nodes))
+    diagonal = np.arange(n_nodes)
+
+    rows = np.concatenate([sources, targets, diagonal])
+    cols = np.concatenate([targets, sources, diagonal])
+    values = np.concatenate([-weights, -weights, degree * node_factor])
+
+    return sparse.coo_matrix((values, (rows, cols)), shape=(n_nodes, n_nodes)).tocsr()
+
+def diffusion_snapshots(laplacian, initial, t_stop, n_snapshots, alpha=1.0):
+    """
+    Evolve initial states under dphi/dt = -alpha * L * phi and yield (time, state) pairs
+    at n_snapshots equally spaced times from 0 to t_stop.
+
+    initial may be a vector of length n or an (n, k) array holding k initial conditions,
+    which are evolved together. Each step applies exp(-alpha * dt * L) with
+    scipy.sparse.linalg.expm_multiply, so only the current state is held in memory.
+    The work per step grows with alpha * dt * ||L||, so large node factors make it stiffer.
+    """
+    state = np.asarray(initial, dtype=float)
+    if state.shape[0] != laplacian.shape[0]:
+        raise ValueError(f"Initial state has {state.shape[0]} rows, graph has {laplacian.shape[0]} nodes")
+
+    generator = (-alpha * laplacian).tocsr()
+    times = np.linspace(0.0, t_stop, n_snapshots)
+
+    yield times[0], state
+    for previous, current in zip(times[:-1], times[1:]):
+        state = expm_multiply(generator * (current - previous), state)
+        yield current, state
+
+def run_diffusion(laplacian, initial, t_stop, n_snapshots, alpha=1.0, output_path=None):
+    """
+    Run a diffusion and collect its snapshots into an array of shape
+    (n_snapshots,) + initial.shape, returned with the snapshot times.
+
+    With output_path the snapshots are streamed into a memory-mapped .npy file as they
+    are produced instead of being kept in RAM.
+    """
+    initial = np.asarray(initial, dtype=float)
+    shape = (n_snapshots,) + initial.shape
+
+    if output_path is None:
+        snapshots = np.empty(shape)
+    else:
+        snapshots = np.lib.format.open_memmap(output_path, mode='w+', dtype=float, shape=shape)
+
+    times = np.empty(n_snapshots)
+    for i, (t, state) in enumerate(diffusion_snapshots(laplacian, initial, t_stop, n_snapshots, alpha)):
+        times[i] = t
+        snapshots[i] = state
+
+    if output_path is not None:
+        snapshots.flush()
+
+    return times, snapshots
+
+# Example usage:
+if __name__ == "__main__":
+    # Periodic 100x100 grid, so every node is 4-valent, with spins 1 and 2 on the edges
+    rng = np.random.default_rng(0)
+    side = 100
+    n_nodes = side * side
+    nodes = np.arange(n_nodes).reshape(side, side)
+    sources = np.concatenate([nodes.ravel(), nodes.ravel()])
+    targets = np.concatenate([np.roll(nodes, 1, axis=1).ravel(), np.roll(nodes, 1, axis=0).ravel()])
+    spins = rng.integers(1, 3, size=sources.size).astype(float)
+
+    laplacian = build_laplacian(n_nodes, sources, targets, spins,
+                                edge_weight='casimir', node_weight='dimension')
+    print(f"Laplacian: {laplacian.shape[0]} nodes, {laplacian.nnz} non-zeros")
+
+    # Two initial conditions evolved together: a point source and a random field
+    initial = np.zeros((n_nodes, 2))
+    initial[0, 0] = 1.0
+    initial[:, 1] = rng.random(n_nodes)
+
+    times, snapshots = run_diffusion(laplacian, initial, t_stop=0.1, n_snapshots=5)
+    for t, state in zip(times, snapshots):
+        print(f"t={t:.2f}  total={state.sum(axis=0)}  max={state.max(axis=0)}")
@@ -0,0 +1,129 @@
+"""
+Parity tests for the Clebsch-Gordan and basis assembly kernels of intertwiner-spaces.py.
+
+Both backends (vectorized NumPy and, when installed, numba) are checked against the
+exact rational Racah evaluation and against sympy.
+
+Usage:
+    python -m pytest python/test_intertwiner_kernels.py
+"""
+
+from itertools import product
+
+import numpy as np
+import pytest
+from sympy import S
+from sympy.physics.quantum.cg import CG
+
+from _intertwiner_loader import load_intertwiner_spaces
+
+intertwiner_spaces = load_intertwiner_spaces()
+
+# Floating point Racah sums agree with the exact values to a few ulps for these spins
+CG_TOLERANCE = 1e-12
+BASIS_TOLERANCE = 1e-12
+
+BACKENDS = {
+    'numpy': (intertwiner_spaces._cg_batch_numpy, intertwiner_spaces._assemble_basis_numpy),
+}
+if intertwiner_spaces.njit is not None:
+    BACKENDS['numba'] = (intertwiner_spaces._cg_batch_jit, intertwiner_spaces._assemble_basis_jit)
+
+# (j1, j2, j3, j4) as doubled spins, including half-integer and unequal legs
+BASIS_SPINS = [(1, 1, 1, 1), (2, 2, 2, 2), (1, 2, 3, 2), (2, 3, 2, 3), (3, 3, 3, 3), (4, 2, 4, 2)]
+
+def _doubled_labels(two_j_max):
+    """All admissible doubled (a, am, b, bm, c, cm) with spins up to two_j_max / 2."""
+    labels = []
+    for a, b in product(range(two_j_max + 1), repeat=2):
+        for c in range(abs(a - b), a + b + 1, 2):
+            for am, bm in product(range(-a, a + 1, 2), range(-b, b + 1, 2)):
+                if abs(am + bm) <= c:
+                    labels.append((a, am, b, bm, c, am + bm))
+    return [np.array(column, dtype=np.int64) for column in zip(*labels)]
+
+def _sympy_cg(a, am, b, bm, c, cm):
+    half = S(1) / 2
+    return float(CG(a * half, am * half, b * half, bm * half, c * half, cm * half).doit())
+
+def _sympy_basis_vector(a1, a2, a3, a4, two_j):
+    """Exact (12)(34) coupled intertwiner from sympy, with the (-1)^(j4-m4) phase."""
+    d2, d3, d4 = a2 + 1, a3 + 1, a4 + 1
+    vector = np.zeros((a1 + 1) * d2 * d3 * d4)
+    for i1, i2, i3, i4 in product(range(a1 + 1), range(d2), range(d3), range(d4)):
+        m1, m2, m3, m4 = a1 - 2 * i1, a2 - 2 * i2, a3 - 2 * i3, a4 - 2 * i4
+        if m1 + m2 + m3 + m4 != 0:
+            continue
+        cg1 = _sympy_cg(a1, m1, a2, m2, two_j, m1 + m2)
+        cg2 = _sympy_cg(two_j, m1 + m2, a3, m3, a4, -m4)
+        vector[((i1 * d2 + i2) * d3 + i3) * d4 + i4] = (-1) ** i4 * cg1 * cg2
+    return vector
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_cg_kernel_matches_exact_racah(backend):
+    cg_kernel, _ = BACKENDS[backend]
+    labels = _doubled_labels(8)
+    fact = intertwiner_spaces._factorials(30)
+    log_fact = intertwiner_spaces._log_factorials(30)
+
+    exact = np.array([intertwiner_spaces._racah_cg_doubled(*(int(x) for x in args), fact)
+                      for args in zip(*labels)])
+    np.testing.assert_allclose(cg_kernel(*labels, log_fact), exact, rtol=0, atol=CG_TOLERANCE)
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_cg_kernel_matches_sympy(backend):
+    cg_kernel, _ = BACKENDS[backend]
+    labels = _doubled_labels(4)
+    log_fact = intertwiner_spaces._log_factorials(14)
+
+    expected = np.array([_sympy_cg(*(int(x) for x in args)) for args in zip(*labels)])
+    np.testing.assert_allclose(cg_kernel(*labels, log_fact), expected, rtol=0, atol=CG_TOLERANCE)
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_cg_kernel_rejects_inadmissible_labels(backend):
+    cg_kernel, _ = BACKENDS[backend]
+    log_fact = intertwiner_spaces._log_factorials(14)
+    # m1 + m2 != m, |m1| > j1, triangle violation, and j1 + j2 + j not an integer
+    labels = [np.array(column, dtype=np.int64) for column in zip(
+        (2, 0, 2, 0, 2, 2), (2, 4, 2, 0, 2, 4), (2, 2, 2, 0, 8, 2), (1, 1, 2, 0, 2, 1))]
+    np.testing.assert_array_equal(cg_kernel(*labels, log_fact), np.zeros(4))
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('spins', BASIS_SPINS)
+def test_basis_assembly_matches_sympy(backend, spins):
+    _, assemble_kernel = BACKENDS[backend]
+    log_fact = intertwiner_spaces._log_factorials(3 * max(spins) + 2)
+
+    for two_j in range(abs(spins[0] - spins[1]), spins[0] + spins[1] + 1, 2):
+        expected = _sympy_basis_vector(*spins, two_j)
+        np.testing.assert_allclose(assemble_kernel(*spins, two_j, log_fact), expected,
+                                   rtol=0, atol=BASIS_TOLERANCE)
+
+@pytest.mark.parametrize('spins', BASIS_SPINS)
+def test_construct_basis_vector_matches_sympy(spins):
+    for two_j in range(abs(spins[0] - spins[1]), spins[0] + spins[1] + 1, 2):
+        expected = _sympy_basis_vector(*spins, two_j)
+        norm = np.linalg.norm(expected)
+        if norm > 1e-10:
+            expected = expected / norm
+        vector = intertwiner_spaces.construct_basis_vector(*(x / 2 for x in spins), two_j / 2)
+        np.testing.assert_allclose(vector, expected, rtol=0, atol=BASIS_TOLERANCE)
+
+@pytest.mark.parametrize('two_j_max', [8, 2 * intertwiner_spaces._KERNEL_MAX_TWO_J + 10])
+def test_cg_coefficient_matches_sympy(two_j_max):
+    # Below the kernel limit the float kernel is used, above it the exact Racah sum
+    rng = np.random.default_rng(two_j_max)
+    for _ in range(200):
+        a, b = (int(x) for x in rng.integers(two_j_max // 2, two_j_max + 1, 2))
+        c = abs(a - b) + 2 * int(rng.integers(0, min(a, b) + 1))
+        am, bm = a - 2 * int(rng.integers(0, a + 1)), b - 2 * int(rng.integers(0, b + 1))
+        if abs(am + bm) > c:
+            continue
+        assert intertwiner_spaces.cg_coefficient(a / 2, am / 2, b / 2, bm / 2, c / 2, (am + bm) / 2) == \
+            pytest.approx(_sympy_cg(a, am, b, bm, c, am + bm), rel=0, abs=CG_TOLERANCE)
+
+def test_check_kernel_parity_reports_small_deviations():
+    deviations = intertwiner_spaces.check_kernel_parity(max_j=3, samples=500)
+    assert set(deviations) == set(BACKENDS)
+    for backend, deviation in deviations.items():
+        assert deviation < BASIS_TOLERANCE, backend
@@ -0,0 +1,68 @@
+"""
+Round-trip tests for memresize.py on the repository's own memory bank.
+
+Usage:
+    python -m pytest test_memresize.py
+"""
+
+import contextlib
+import io
+import shutil
+
+import pytest
+
+import memresize
+
+@pytest.fixture
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+@pytest.fixture
+def restore_paths():
+    yield
+    memresize.configure()
+
+def _clean_paths(paths):
+    return all(not path.startswith('-') and '`' not in path for path in paths)
+
+def test_merged_task_files_keep_file_lists(tmp_path, quiet):
+    # Merge the per-item files in memory-bank/tasks/ and parse the result again
+    output = tmp_path / "tasks_merged.md"
+    memresize.merge_task_files([memresize.TASKS_DIR], output)
+    tasks = memresize.parse_tasks(output.read_text(encoding='utf-8'))
+
+    plain_ids = {path.stem for path in memresize.TASKS_DIR.iterdir()
+                 if (match := memresize.TASK_FILE_RE.match(path.name)) and not match.group(2)}
+    assert set(tasks) == plain_ids
+    for task_id, task in tasks.items():
+        assert _clean_paths(memresize._file_paths(task['files'])), task_id
+    assert memresize._file_paths(tasks['T70']['files']) == [
+        'packages/graph-test-app/src/components/graph/GraphManager/index.tsx',
+        'packages/graph-ui/src/components/canvas/GraphCanvas.tsx',
+    ]
+
+def test_split_merge_parse_round_trip(tmp_path, quiet, restore_paths):
+    # Split the monolithic files into per-item files, merge them back and parse them
+    original_tasks = memresize.parse_tasks(memresize.TASKS_PATH.read_text(encoding='utf-8'))
+    original_sessions = memresize.parse_session_cache(memresize.SESSION_CACHE_PATH.read_text(encoding='utf-8'))
+    shutil.copytree(memresize.TEMPLATE_DIR, tmp_path / "templates")
+    shutil.copy(memresize.TASKS_PATH, tmp_path / "tasks.md")
+    shutil.copy(memresize.SESSION_CACHE_PATH, tmp_path / "session_cache.md")
+
+    memresize.configure(memory_bank=tmp_path)
+    memresize.main()
+    memresize.merge()
+    tasks = memresize.parse_tasks((tmp_path / "tasks_merged.md").read_text(encoding='utf-8'))
+    sessions = memresize.parse_session_cache((tmp_path / "session_cache_merged.md").read_text(encoding='utf-8'))
+
+    assert set(tasks) == set(original_tasks)
+    assert set(sessions) == set(original_sessions)
+    for merged, original in ((tasks, original_tasks), (sessions, original_sessions)):
+        for record_id, record in merged.items():
+            paths = memresize._file_paths(record['files'])
+            assert _clean_paths(paths), record_id
+            # File lists that were well formed to begin with survive unchanged
+            original_paths = memresize._file_paths(original[record_id]['files'])
+            if original_paths and _clean_paths(original_paths) and '\n' not in original[record_id]['files']:
+                assert paths == original_paths, record_id